@@ -1,7 +1,11 @@
+import hashlib
+import hmac
 import smtplib
+import time
 from email.mime.text import MIMEText
 from datetime import datetime, timedelta
-from fastapi import Depends, HTTPException, status
+from typing import Optional, Tuple
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -10,12 +14,14 @@ from .config import settings
 from .database import get_db  # <-- Correctly imports from database.py
 from .crud import get_user_by_username
 from .schemas import User
+from .executors import bcrypt_executor, email_executor
 import secrets
 import string
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token", auto_error=False)
 
 # Password verification
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -25,10 +31,14 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+# Hash password on the bcrypt pool so the event loop keeps serving other requests
+async def get_password_hash_async(password: str) -> str:
+    return await bcrypt_executor.run(get_password_hash, password)
+
 # Authenticate user
 async def authenticate_user(db: AsyncSession, username: str, password: str) -> User | bool:
     user = await get_user_by_username(db, username)
-    if not user or not verify_password(password, user.hashed_password):
+    if not user or not await bcrypt_executor.run(verify_password, password, user.hashed_password):
         return False
     return user
 
@@ -39,43 +49,64 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
-# Create reset token
-def create_reset_token(mobile_number: str, expires_delta: timedelta = None) -> str:
-    to_encode = {"sub": mobile_number, "type": "reset"}
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.RESET_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+# Create stream token (browser EventSource can't send an Authorization header, so it goes in the URL)
+def create_stream_token(username: str) -> str:
+    expire = datetime.utcnow() + timedelta(seconds=settings.STREAM_TOKEN_EXPIRE_SECONDS)
+    return jwt.encode({"sub": username, "type": "stream", "exp": expire}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+# Password reset codes are short enough to type from an SMS. Only an HMAC of the code is
+# stored, in users.reset_token as "<expiry epoch>:<failed attempts>:<hmac>"
+def generate_reset_code() -> str:
+    return f"{secrets.randbelow(10 ** settings.RESET_CODE_LENGTH):0{settings.RESET_CODE_LENGTH}d}"
 
-# Verify reset token
-def verify_reset_token(token: str) -> str:
+def _reset_code_digest(user_id: int, code: str) -> str:
+    return hmac.new(settings.SECRET_KEY.encode(), f"{user_id}:{code}".encode(), hashlib.sha256).hexdigest()
+
+def hash_reset_code(user_id: int, code: str, expires_delta: timedelta = None) -> str:
+    expires_delta = expires_delta or timedelta(minutes=settings.RESET_TOKEN_EXPIRE_MINUTES)
+    return f"{int(time.time() + expires_delta.total_seconds())}:0:{_reset_code_digest(user_id, code)}"
+
+# Verify reset code
+def check_reset_code(user_id: int, code: str, stored: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """
+    Compare `code` with the stored reset code. Returns whether it matched and what to store
+    next: nothing once it is used, expired or guessed wrong RESET_CODE_MAX_ATTEMPTS times.
+    """
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        mobile_number: str = payload.get("sub")
-        if mobile_number is None or payload.get("type") != "reset":
-            raise HTTPException(status_code=400, detail="Invalid reset token")
-        return mobile_number
-    except JWTError:
-        raise HTTPException(status_code=400, detail="Invalid or expired reset token")
+        expires_at, attempts, digest = stored.split(":")
+        expires_at, attempts = int(expires_at), int(attempts)
+    except (AttributeError, ValueError):
+        return False, None
+    if time.time() > expires_at:
+        return False, None
+    if hmac.compare_digest(digest, _reset_code_digest(user_id, code)):
+        return True, None
+    attempts += 1
+    if attempts >= settings.RESET_CODE_MAX_ATTEMPTS:
+        return False, None
+    return False, f"{expires_at}:{attempts}:{digest}"
 
 # Send email
+def _send_email_sync(msg: MIMEText) -> None:
+    with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
+        server.starttls()
+        server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        server.send_message(msg)
+
 async def send_email(to_email: str, subject: str, body: str) -> None:
     msg = MIMEText(body)
     msg['Subject'] = subject
     msg['From'] = settings.SMTP_USER
     msg['To'] = to_email
-
-    with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-        server.starttls()
-        server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-        server.send_message(msg)
+    await email_executor.run(_send_email_sync, msg)
 
 # Generate random password
 def generate_random_password(length: int = 12) -> str:
     characters = string.ascii_letters + string.digits + string.punctuation
     return ''.join(secrets.choice(characters) for _ in range(length))
 
-# Get current user from token
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+# Resolve a token of the given type ("access" tokens carry no type claim) to its user
+async def _user_from_token(db: AsyncSession, token: str, token_type: Optional[str] = None) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -84,11 +115,31 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: str = payload.get("sub")
-        if username is None:
+        if username is None or payload.get("type") != token_type:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
     user = await get_user_by_username(db, username)
     if user is None:
         raise credentials_exception
-    return user
\ No newline at end of file
+    return user
+
+# Get current user from token
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+    return await _user_from_token(db, token)
+
+# Get current user from the Authorization header, or from a stream token in the query string
+async def get_stream_user(
+    token: Optional[str] = Query(None, description="Token from POST /approvals/stream-token, for clients that can't set headers"),
+    bearer: Optional[str] = Depends(optional_oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    if bearer:
+        return await _user_from_token(db, bearer)
+    if token:
+        return await _user_from_token(db, token, token_type="stream")
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Not authenticated",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
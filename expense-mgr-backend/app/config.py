@@ -7,12 +7,24 @@ class Settings(BaseSettings):
     """
     # Database
     DATABASE_URL: str
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    # Connections opened at startup so the first requests don't pay for the handshake
+    DB_POOL_WARM: int = 5
+    # Create missing tables at startup (local/dev only, use Alembic everywhere else)
+    DB_CREATE_ALL: bool = False
 
     # Authentication
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     RESET_TOKEN_EXPIRE_MINUTES: int = 30
+    # Password reset codes sent by SMS: digits, and wrong guesses before a code is void
+    RESET_CODE_LENGTH: int = 6
+    RESET_CODE_MAX_ATTEMPTS: int = 5
+    # Tokens for GET /approvals/stream?token=..., which appear in URLs and so are short-lived
+    STREAM_TOKEN_EXPIRE_SECONDS: int = 60
     
     # Email Settings
     SMTP_HOST: str
@@ -24,6 +36,54 @@ class Settings(BaseSettings):
     SMS_API_URL: str
     SMS_API_KEY: str
     SMS_SENDER_ID: str
+    SMS_TIMEOUT_SECONDS: float = 5.0
+    SMS_MAX_CONNECTIONS: int = 10
+    SMS_QUEUE_SIZE: int = 1000
+    SMS_WORKERS: int = 4
+    SMS_MAX_ATTEMPTS: int = 3
+    SMS_BACKOFF_SECONDS: float = 0.5
+    # Consecutive failures that open the circuit, and how long it stays open
+    SMS_BREAKER_FAILURES: int = 5
+    SMS_BREAKER_RESET_SECONDS: float = 30.0
+    SMS_PER_NUMBER_LIMIT: int = 3
+    SMS_PER_NUMBER_WINDOW_SECONDS: float = 600.0
+
+    # External APIs used by the currency service
+    COUNTRIES_API_URL: str = "https://restcountries.com/v3.1/all?fields=name,currencies"
+    EXCHANGE_API_URL: str = "https://api.exchangerate-api.com/v4/latest/{base}"
+    EXCHANGE_API_KEY: str = ""
+
+    # Audit log (events are buffered in memory and written in batches)
+    AUDIT_BUFFER_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 2.0
+    # Failed flushes of the same batch before it is written row by row to isolate bad events
+    AUDIT_MAX_ATTEMPTS: int = 5
+    # Whole months of history to keep, 0 disables pruning
+    AUDIT_RETENTION_MONTHS: int = 12
+
+    # Approval inbox events (Server-Sent Events)
+    EVENTS_SUBSCRIBER_BUFFER: int = 100
+    EVENTS_REPLAY_SIZE: int = 200
+    # How long a user's recent events stay resumable once nobody is subscribed
+    EVENTS_REPLAY_TTL_SECONDS: float = 3600.0
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+
+    # Approval SLA: remind the approver, then hand the request to their manager
+    APPROVAL_SLA_ENABLED: bool = True
+    APPROVAL_REMINDER_HOURS: float = 24
+    APPROVAL_ESCALATION_HOURS: float = 72
+
+    # Expense report exports (files are shared by all workers and reused until the data changes)
+    REPORTS_DIR: str = "reports"
+    REPORTS_MAX_CONCURRENT: int = 2
+    # Rows fetched per round trip from the server-side cursor
+    REPORTS_FETCH_SIZE: int = 2000
+    REPORTS_RETENTION_HOURS: float = 24
+
+    # Per-company settings and approval rules cached in each worker
+    TENANT_CACHE_SIZE: int = 1000
+    TENANT_CACHE_TTL_SECONDS: float = 300.0
 
     # Application Settings
     APP_NAME: str = "Expense Management System"
@@ -1,7 +1,12 @@
-from sqlalchemy import select
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import and_, func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from .models import Company, User, Expense, ExpenseCategory, ApprovalRule, ApprovalRequest, AuditLog
+from .models import Company, User, Expense, ExpenseCategory, ExpenseStatus, ApprovalRule, ApprovalRequest, AuditLog
 from fastapi import HTTPException
+from .services import search
+from .services.audit import record_event
+from .services.tenant_cache import tenant_cache
 
 async def create_company(db: AsyncSession, company: dict):
     db_company = Company(**company)
@@ -21,10 +26,43 @@ async def get_user_by_username(db: AsyncSession, username: str):
     result = await db.execute(select(User).where(User.username == username))
     return result.scalars().first()
 
+async def get_user(db: AsyncSession, user_id: int):
+    return await db.get(User, user_id)
+
+async def update_user(db: AsyncSession, user_id: int, updates: dict):
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    for field, value in updates.items():
+        setattr(user, field, value)
+    await db.commit()
+    await db.refresh(user)
+    return user
+
 async def get_company_by_id(db: AsyncSession, company_id: int):
     result = await db.execute(select(Company).where(Company.id == company_id))
     return result.scalars().first()
 
+# Every write to a company or its rules goes through here, in the writing transaction
+async def _bump_settings_version(db: AsyncSession, company_id: int, updates: Optional[dict] = None) -> int:
+    result = await db.execute(
+        update(Company)
+        .where(Company.id == company_id)
+        .values(**(updates or {}), settings_version=Company.settings_version + 1)
+        .returning(Company.settings_version)
+    )
+    version = result.scalar()
+    if version is None:
+        raise HTTPException(status_code=404, detail="Company not found")
+    return version
+
+async def update_company(db: AsyncSession, company_id: int, updates: dict):
+    version = await _bump_settings_version(db, company_id, updates)
+    await db.commit()
+    await tenant_cache.invalidate(company_id, version)
+    result = await db.execute(select(Company).where(Company.id == company_id).execution_options(populate_existing=True))
+    return result.scalars().first()
+
 async def create_expense(db: AsyncSession, expense: dict):
     db_expense = Expense(**expense)
     db.add(db_expense)
@@ -32,6 +70,156 @@ async def create_expense(db: AsyncSession, expense: dict):
     await db.refresh(db_expense)
     return db_expense
 
+async def update_expense_status(db: AsyncSession, expense_id: int, status: ExpenseStatus, company_id: int):
+    expense = await db.get(Expense, expense_id)
+    if not expense or expense.company_id != company_id:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    expense.status = status
+    await db.commit()
+    await db.refresh(expense)
+    return expense
+
+async def get_approval_request(db: AsyncSession, approval_id: int):
+    return await db.get(ApprovalRequest, approval_id)
+
+async def update_approval_request(db: AsyncSession, approval_id: int, updates: dict):
+    approval = await db.get(ApprovalRequest, approval_id)
+    if not approval:
+        raise HTTPException(status_code=404, detail="Approval request not found")
+    for field, value in updates.items():
+        setattr(approval, field, value)
+    await db.commit()
+    await db.refresh(approval)
+    return approval
+
+async def create_approval_rule(db: AsyncSession, rule: dict, company_id: int):
+    db_rule = ApprovalRule(**rule, company_id=company_id)
+    db.add(db_rule)
+    version = await _bump_settings_version(db, company_id)
+    await db.commit()
+    await db.refresh(db_rule)
+    await tenant_cache.invalidate(company_id, version)
+    return db_rule
+
+async def get_approval_rules(db: AsyncSession, company_id: int):
+    result = await db.execute(select(ApprovalRule).where(ApprovalRule.company_id == company_id).order_by(ApprovalRule.id))
+    return result.scalars().all()
+
+# --- Listings ---
+# Listings return plain column rows (see schemas.*Row) and page with a keyset on id:
+# pass the last id of the previous page as `before_id`.
+EXPENSE_ROW_COLUMNS = (
+    Expense.id, Expense.employee_id, Expense.amount, Expense.currency, Expense.amount_in_company_currency,
+    Expense.category, Expense.description, Expense.date, Expense.status,
+)
+
+def _page(query, id_column, before_id: Optional[int], limit: int):
+    if before_id is not None:
+        query = query.where(id_column < before_id)
+    return query.order_by(id_column.desc()).limit(limit)
+
+async def get_expenses_for_user(db: AsyncSession, user_id: int, before_id: Optional[int] = None, limit: int = 100):
+    query = select(*EXPENSE_ROW_COLUMNS).where(Expense.employee_id == user_id)
+    result = await db.execute(_page(query, Expense.id, before_id, limit))
+    return result.all()
+
+async def get_all_expenses(
+    db: AsyncSession,
+    company_id: int,
+    status: Optional[ExpenseStatus] = None,
+    before_id: Optional[int] = None,
+    limit: int = 100,
+):
+    query = select(*EXPENSE_ROW_COLUMNS).where(Expense.company_id == company_id)
+    if status is not None:
+        query = query.where(Expense.status == status)
+    result = await db.execute(_page(query, Expense.id, before_id, limit))
+    return result.all()
+
+async def search_expenses(
+    db: AsyncSession,
+    company_id: int,
+    text_query: str,
+    employee_id: Optional[int] = None,
+    status: Optional[ExpenseStatus] = None,
+    order: str = "rank",
+    before_id: Optional[int] = None,
+    before_rank: Optional[float] = None,
+    limit: int = 100,
+):
+    """
+    Expenses whose category or description contain every word of `text_query` as a prefix.
+    Ordered by rank with an (rank, id) keyset, or by id like the other listings when `order` is "recent".
+    """
+    terms = search.match_terms(text_query)
+    if not terms:
+        return []
+    query = select(*EXPENSE_ROW_COLUMNS).where(Expense.company_id == company_id)
+    query, rank, id_column = search.apply_match(query, db.get_bind().dialect.name, terms)
+    query = query.add_columns(rank.label("rank"))
+    if employee_id is not None:
+        query = query.where(Expense.employee_id == employee_id)
+    if status is not None:
+        query = query.where(Expense.status == status)
+    if order == "recent":
+        query = _page(query, id_column, before_id, limit)
+    else:
+        if before_rank is not None and before_id is not None:
+            query = query.where(or_(rank < before_rank, and_(rank == before_rank, id_column < before_id)))
+        query = query.order_by(rank.desc(), id_column.desc()).limit(limit)
+    result = await db.execute(query)
+    return result.all()
+
+# --- Reports ---
+def expense_report_query(
+    company_id: int,
+    status: Optional[ExpenseStatus] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    query = (
+        select(
+            Expense.id, Expense.date, Expense.employee_id, User.username.label("employee"),
+            Expense.category, Expense.description, Expense.amount, Expense.currency,
+            Expense.amount_in_company_currency, Expense.status,
+        )
+        .join(User, Expense.employee_id == User.id)
+        .where(Expense.company_id == company_id)
+    )
+    if status is not None:
+        query = query.where(Expense.status == status)
+    if since is not None:
+        query = query.where(Expense.date >= since)
+    if until is not None:
+        query = query.where(Expense.date < until)
+    return query.order_by(Expense.id)
+
+async def get_expense_data_version(db: AsyncSession, company_id: int) -> str:
+    """Fingerprint of a company's expenses that changes with every insert, update or delete."""
+    result = await db.execute(
+        select(func.count(Expense.id), func.max(Expense.id), func.max(Expense.updated_at))
+        .where(Expense.company_id == company_id)
+    )
+    count, max_id, last_change = result.one()
+    return f"{count}:{max_id}:{last_change.isoformat() if last_change else ''}"
+
+async def get_pending_approvals(db: AsyncSession, approver_id: int, before_id: Optional[int] = None, limit: int = 100):
+    query = (
+        select(
+            ApprovalRequest.id, ApprovalRequest.expense_id, ApprovalRequest.step, ApprovalRequest.created_at,
+            Expense.employee_id, Expense.amount, Expense.currency, Expense.category, Expense.description,
+        )
+        .join(Expense, ApprovalRequest.expense_id == Expense.id)
+        .where(ApprovalRequest.approver_id == approver_id, ApprovalRequest.approved.is_(None))
+    )
+    result = await db.execute(_page(query, ApprovalRequest.id, before_id, limit))
+    return result.all()
+
+async def get_users_by_company(db: AsyncSession, company_id: int, before_id: Optional[int] = None, limit: int = 100):
+    query = select(User.id, User.username, User.email, User.role, User.manager_id).where(User.company_id == company_id)
+    result = await db.execute(_page(query, User.id, before_id, limit))
+    return result.all()
+
 async def update_user_reset_token(db: AsyncSession, email: str, reset_token: str):
     result = await db.execute(select(User).where(User.email == email))
     user = result.scalars().first()
@@ -42,6 +230,14 @@ async def update_user_reset_token(db: AsyncSession, email: str, reset_token: str
     await db.refresh(user)
     return user
 
+async def replace_user_reset_token(db: AsyncSession, user_id: int, expected: Optional[str], reset_token: Optional[str]) -> bool:
+    """Swap the user's reset token only if it is still `expected`, so concurrent attempts can't reuse one state."""
+    result = await db.execute(
+        update(User).where(User.id == user_id, User.reset_token == expected).values(reset_token=reset_token)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
 async def update_user_password(db: AsyncSession, email: str, hashed_password: str):
     result = await db.execute(select(User).where(User.email == email))
     user = result.scalars().first()
@@ -50,4 +246,30 @@ async def update_user_password(db: AsyncSession, email: str, hashed_password: st
     user.hashed_password = hashed_password
     await db.commit()
     await db.refresh(user)
-    return user
\ No newline at end of file
+    record_event("password_change", user.id)
+    return user
+
+async def get_audit_logs(
+    db: AsyncSession,
+    company_id: int,
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = 100,
+):
+    query = (
+        select(AuditLog)
+        .join(User, AuditLog.user_id == User.id)
+        .where(User.company_id == company_id)
+    )
+    if user_id is not None:
+        query = query.where(AuditLog.user_id == user_id)
+    if action is not None:
+        query = query.where(AuditLog.action == action)
+    if since is not None:
+        query = query.where(AuditLog.timestamp >= since)
+    if until is not None:
+        query = query.where(AuditLog.timestamp < until)
+    result = await db.execute(query.order_by(AuditLog.timestamp.desc()).limit(limit))
+    return result.scalars().all()
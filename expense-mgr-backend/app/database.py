@@ -1,12 +1,23 @@
+import asyncio
+import logging
+import os
+from typing import Optional
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from .config import settings
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=True,
-    future=True
-)
+logger = logging.getLogger(__name__)
+
+engine_options = {"echo": settings.DB_ECHO, "future": True}
+# SQLite uses a single-connection pool that doesn't accept sizing arguments
+if not settings.DATABASE_URL.startswith("sqlite"):
+    engine_options.update(pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW)
+
+engine = create_async_engine(settings.DATABASE_URL, **engine_options)
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -18,9 +29,74 @@ AsyncSessionLocal = sessionmaker(
 
 Base = declarative_base()
 
+# Arbitrary key shared by all workers so only one of them runs DDL at a time
+SCHEMA_LOCK_ID = 724_311
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+def _current_revision(sync_conn) -> Optional[str]:
+    return MigrationContext.configure(sync_conn).get_current_revision()
+
+def _stamp_head(sync_conn) -> None:
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    MigrationContext.configure(sync_conn).stamp(ScriptDirectory.from_config(config), "head")
+
+async def create_schema():
+    """
+    Create missing tables. Postgres workers serialize on an advisory lock instead of racing.
+    A database built from scratch is stamped with the latest Alembic revision, since it
+    already has everything the migrations would add.
+    """
+    from .services.search import install_search_index
+
+    async with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": SCHEMA_LOCK_ID})
+        existing = await conn.run_sync(lambda sync_conn: set(inspect(sync_conn).get_table_names()))
+        await conn.run_sync(Base.metadata.create_all)
+        await install_search_index(conn)
+        if await conn.run_sync(_current_revision) is not None:
+            return
+        if existing.isdisjoint(Base.metadata.tables):
+            await conn.run_sync(_stamp_head)
+        else:
+            logger.warning(
+                "Database has tables but no Alembic revision; stamp the revision it matches "
+                "(`alembic stamp 0000_baseline` for one created before migrations), then `alembic upgrade head`"
+            )
+
+def _missing_schema(sync_conn) -> list[str]:
+    inspector = inspect(sync_conn)
+    existing = set(inspector.get_table_names())
+    missing = []
+    for name, table in Base.metadata.tables.items():
+        if name not in existing:
+            missing.append(name)
+            continue
+        columns = {column["name"] for column in inspector.get_columns(name)}
+        missing.extend(f"{name}.{column.name}" for column in table.columns if column.name not in columns)
+    return missing
+
+async def verify_schema() -> list[str]:
+    """Return the tables, and the columns of existing tables ("table.column"), that the models expect but the database doesn't have."""
+    async with engine.connect() as conn:
+        missing = await conn.run_sync(_missing_schema)
+    if missing:
+        logger.warning(f"Database is missing {missing}, run `alembic upgrade head`")
+    return missing
+
+async def warm_pool(size: int = settings.DB_POOL_WARM):
+    """Open `size` connections concurrently so they sit ready in the pool."""
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(max(size, 1))))
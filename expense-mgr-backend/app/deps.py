@@ -1,13 +1,30 @@
 from fastapi import Depends, HTTPException, status
 from . import models
-from .auth import get_current_user
+from .auth import get_current_user, get_stream_user
+from .database import get_db  # re-exported for the routers
 
 # This is an example of a higher-level dependency.
 # It depends on get_current_user to do its job.
 # This is a clean pattern with no circular imports.
 async def get_current_admin_user(current_user: models.User = Depends(get_current_user)):
-    if current_user.role != "ADMIN":
+    if current_user.role != models.Role.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="The user doesn't have enough privileges"
         )
     return current_user
+
+async def get_current_manager_or_admin_user(current_user: models.User = Depends(get_current_user)):
+    if current_user.role not in (models.Role.MANAGER, models.Role.ADMIN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="The user doesn't have enough privileges"
+        )
+    return current_user
+
+# Same check for the approvals stream, which also accepts a stream token in the URL
+async def get_stream_manager_or_admin_user(current_user: models.User = Depends(get_stream_user)):
+    return await get_current_manager_or_admin_user(current_user)
+
+# Short names used by the routers
+is_admin = get_current_admin_user
+is_manager_or_admin = get_current_manager_or_admin_user
+is_stream_manager_or_admin = get_stream_manager_or_admin_user
@@ -3,7 +3,11 @@ import smtplib
 from datetime import datetime
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+import structlog
 from dotenv import load_dotenv
+from .executors import email_executor
+
+logger = structlog.get_logger(__name__)
 
 # Load environment variables from your .env file
 load_dotenv()
@@ -22,7 +26,7 @@ def send_login_notification_email(user: dict):
     """
     # Ensure all required environment variables are present
     if not all([SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, RECIPIENT_EMAIL]):
-        print("❌ SMTP settings are missing in the .env file. Cannot send email.")
+        logger.error("smtp_settings_missing")
         return
 
     # Create the email message
@@ -43,7 +47,7 @@ def send_login_notification_email(user: dict):
     msg.attach(MIMEText(html_body, 'html'))
 
     try:
-        print(f"Attempting to send notification to {RECIPIENT_EMAIL}...")
+        logger.info("login_notification_sending", recipient=RECIPIENT_EMAIL)
         # Using STARTTLS (port 587)
         if SMTP_PORT == 587:
             with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
@@ -57,12 +61,16 @@ def send_login_notification_email(user: dict):
                 server.login(SMTP_USER, SMTP_PASSWORD)
                 server.send_message(msg)
         else:
-            print(f"Unsupported SMTP port {SMTP_PORT}. Email not sent.")
+            logger.error("smtp_port_unsupported", port=SMTP_PORT)
             return
 
-        print(f"✅ Login notification email sent successfully for {user['email']}")
+        logger.info("login_notification_sent", user_email=user['email'])
 
     except smtplib.SMTPAuthenticationError:
-        print("\n❌ EMAIL AUTH FAILED: Check your SMTP_USER and SMTP_PASSWORD in the .env file.")
+        logger.error("smtp_auth_failed", hint="Check SMTP_USER and SMTP_PASSWORD in the .env file")
     except Exception as e:
-        print(f"\n❌ An unexpected error occurred while sending email: {e}")
\ No newline at end of file
+        logger.exception("login_notification_failed", error=str(e))
+
+async def send_login_notification(user: dict):
+    """Async wrapper that runs the SMTP conversation on the shared email pool."""
+    await email_executor.run(send_login_notification_email, user)
\ No newline at end of file
@@ -0,0 +1,52 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from .metrics import EXECUTOR_ACTIVE, EXECUTOR_PENDING
+
+class InstrumentedExecutor:
+    """
+    A named thread pool for blocking work (bcrypt, OCR, SMTP) that keeps the event loop free
+    and reports how many tasks are queued and running to /metrics.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.pending = 0
+        self.active = 0
+        # Counters are touched from the loop and the worker threads
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        EXECUTOR_PENDING.set_function(lambda: self.pending, name)
+        EXECUTOR_ACTIVE.set_function(lambda: self.active, name)
+
+    def _call(self, fn):
+        with self._lock:
+            self.pending -= 1
+            self.active += 1
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        with self._lock:
+            self.pending += 1
+        future = self._pool.submit(self._call, partial(fn, *args, **kwargs))
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # A task cancelled before it started never reaches _call
+            if future.cancel():
+                with self._lock:
+                    self.pending -= 1
+            raise
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+# bcrypt is deliberately slow; a small pool stops login bursts from starving other work
+bcrypt_executor = InstrumentedExecutor("bcrypt", max_workers=4)
+ocr_executor = InstrumentedExecutor("ocr", max_workers=2)
+email_executor = InstrumentedExecutor("email", max_workers=2)
@@ -1,18 +1,61 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from .database import engine, Base
-from .routers import auth, expenses, approvals, users
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from .config import settings
+from .database import engine, create_schema, verify_schema, warm_pool
+from .executors import bcrypt_executor, email_executor, ocr_executor
+from .logging_config import configure_logging
+from .metrics import MetricsMiddleware, instrument_engine, registry
+from .routers import auth, expenses, approvals, users, audit, admin
+from .services.audit import audit_writer
+from .services.events import broker
+from .services.reports import report_manager
+from .services.search import search_index
+from .services.sla_scheduler import sla_scheduler
+from .services.sms import sms_dispatcher
+from .static_assets import StaticAssets
 import os
 
-# Create DB tables
-Base.metadata.create_all(bind=engine)
+configure_logging()
+instrument_engine(engine)
+
+# Static frontend (scanned and precompressed once at startup)
+static_file_path = os.path.join(os.path.dirname(__file__), "..", "static")
+static_assets = StaticAssets(static_file_path)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema is owned by Alembic; create_all is only a local/dev convenience
+    if settings.DB_CREATE_ALL:
+        await create_schema()
+    else:
+        await verify_schema()
+    await search_index.prepare()
+    await warm_pool()
+    static_assets.load()
+    await audit_writer.start()
+    await broker.start()
+    await sms_dispatcher.start()
+    if settings.APPROVAL_SLA_ENABLED:
+        await sla_scheduler.start()
+    yield
+    await sla_scheduler.stop()
+    await report_manager.stop()
+    await sms_dispatcher.stop()
+    await broker.stop()
+    # Flush buffered audit events before the pool goes away
+    await audit_writer.stop()
+    await engine.dispose()
+    for executor in (bcrypt_executor, ocr_executor, email_executor):
+        executor.shutdown()
 
 app = FastAPI(
     title="ExpensoMan API",
     description="Backend for the Expense Management System.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Enable CORS
@@ -23,26 +66,36 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so the recorded latency covers the whole stack
+app.add_middleware(MetricsMiddleware)
 
 # Routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(expenses.router, prefix="/expenses", tags=["Expenses"])
 app.include_router(approvals.router, prefix="/approvals", tags=["Approvals"])
+app.include_router(audit.router, prefix="/audit", tags=["Audit"])
+app.include_router(admin.router, prefix="/admin", tags=["Admin"])
+
+# Prometheus scrape endpoint
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 # Static frontend serving
-static_file_path = os.path.join(os.path.dirname(__file__), "..", "static")
-app.mount("/static", StaticFiles(directory=static_file_path), name="static")
+@app.api_route("/static/{file_path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def read_static(file_path: str, request: Request):
+    return static_assets.serve_path(file_path, request)
 
 # Root → index.html
-@app.get("/", response_class=FileResponse, tags=["Root"])
-async def read_index():
-    return FileResponse(os.path.join(static_file_path, "index.html"))
+@app.api_route("/", methods=["GET", "HEAD"], tags=["Root"])
+async def read_index(request: Request):
+    return static_assets.serve_index(request)
 
-# Catch-all → index.html (for React Router)
-@app.get("/{full_path:path}", response_class=FileResponse, tags=["Root"])
+# Catch-all → top-level asset if it exists, otherwise index.html (for React Router)
+@app.api_route("/{full_path:path}", methods=["GET", "HEAD"], tags=["Root"])
 async def catch_all(full_path: str, request: Request):
-    index_path = os.path.join(static_file_path, "index.html")
-    if os.path.exists(index_path):
-        return FileResponse(index_path)
-    return {"error": "Not found"}
+    asset = static_assets.get(full_path)
+    if asset is not None:
+        return static_assets.serve(asset, request)
+    return static_assets.serve_index(request)
@@ -0,0 +1,201 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import structlog
+from sqlalchemy import event
+
+logger = structlog.get_logger("app.requests")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1.0) -> None:
+        self.values[label_values] = self.values.get(label_values, 0.0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for key, value in self.values.items():
+            yield f"{self.name}{_format_labels(self.labels, key)} {value}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self.values: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        series = self.values.get(label_values)
+        if series is None:
+            series = self.values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self) -> Iterable[str]:
+        for key, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {series[-1]}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}"
+
+
+class Gauge:
+    """A gauge whose values are read from a callback at scrape time, so hot paths pay nothing."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self.callbacks: Dict[Tuple, Callable[[], float]] = {}
+
+    def set_function(self, fn: Callable[[], float], *label_values) -> None:
+        self.callbacks[label_values] = fn
+
+    def samples(self) -> Iterable[str]:
+        for key, fn in self.callbacks.items():
+            yield f"{self.name}{_format_labels(self.labels, key)} {fn()}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.register(Histogram("http_request_duration_seconds", "Request latency by route", ("method", "route")))
+REQUESTS = registry.register(Counter("http_requests_total", "Requests by route and status", ("method", "route", "status")))
+REQUEST_DB_TIME = registry.register(Histogram("http_request_db_seconds", "Database time spent per request", ("route",)))
+REQUEST_DB_STATEMENTS = registry.register(Histogram("http_request_db_statements", "Statements executed per request", ("route",), COUNT_BUCKETS))
+REQUEST_OUTBOUND_TIME = registry.register(Histogram("http_request_outbound_seconds", "Outbound HTTP time spent per request", ("route",)))
+DB_STATEMENT_LATENCY = registry.register(Histogram("db_statement_duration_seconds", "Latency of individual SQL statements"))
+OUTBOUND_LATENCY = registry.register(Histogram("http_client_duration_seconds", "Outbound HTTP call latency", ("target",)))
+EXECUTOR_PENDING = registry.register(Gauge("executor_pending_tasks", "Tasks waiting for a worker thread", ("executor",)))
+EXECUTOR_ACTIVE = registry.register(Gauge("executor_active_tasks", "Tasks currently running on a worker thread", ("executor",)))
+QUEUE_DEPTH = registry.register(Gauge("queue_depth", "Items waiting in in-process queues", ("queue",)))
+
+
+@dataclass
+class RequestStats:
+    db_statements: int = 0
+    db_seconds: float = 0.0
+    outbound_seconds: float = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement on `engine` and attribute it to the request being served."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        DB_STATEMENT_LATENCY.observe(elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.db_statements += 1
+            stats.db_seconds += elapsed
+
+
+@contextmanager
+def track_http(target: str):
+    """Wrap an outbound HTTP call: `with track_http("exchange_rates"): requests.get(...)`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        OUTBOUND_LATENCY.observe(elapsed, target)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.outbound_seconds += elapsed
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency, DB and outbound HTTP time per route template
+    and emitting one structured log line per request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stats.reset(token)
+            # Label by the route template, not the raw path, to keep cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            REQUEST_LATENCY.observe(elapsed, method, route)
+            REQUESTS.inc(method, route, status_code)
+            REQUEST_DB_TIME.observe(stats.db_seconds, route)
+            REQUEST_DB_STATEMENTS.observe(stats.db_statements, route)
+            REQUEST_OUTBOUND_TIME.observe(stats.outbound_seconds, route)
+            logger.info(
+                "request",
+                method=method,
+                route=route,
+                status=status_code,
+                duration_ms=round(elapsed * 1000, 2),
+                db_statements=stats.db_statements,
+                db_ms=round(stats.db_seconds * 1000, 2),
+                outbound_ms=round(stats.outbound_seconds * 1000, 2),
+            )
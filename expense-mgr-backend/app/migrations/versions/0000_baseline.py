@@ -0,0 +1,106 @@
+"""Baseline schema: the tables as they were before migrations were tracked
+
+Databases created before this revision (by create_all) already have these tables;
+stamp them with `alembic stamp 0000_baseline` and then `alembic upgrade head`.
+
+Revision ID: 0000_baseline
+Revises:
+Create Date: 2026-10-19
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0000_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "companies",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("currency", sa.String(3)),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_companies_id", "companies", ["id"])
+    op.create_index("ix_companies_name", "companies", ["name"])
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String()),
+        sa.Column("email", sa.String()),
+        sa.Column("hashed_password", sa.String()),
+        sa.Column("role", sa.Enum("ADMIN", "MANAGER", "EMPLOYEE", name="role")),
+        sa.Column("company_id", sa.Integer(), sa.ForeignKey("companies.id")),
+        sa.Column("manager_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("is_manager_approver", sa.Boolean()),
+        sa.Column("reset_token", sa.String(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "expense_categories",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("company_id", sa.Integer(), sa.ForeignKey("companies.id")),
+    )
+    op.create_index("ix_expense_categories_id", "expense_categories", ["id"])
+    op.create_index("ix_expense_categories_name", "expense_categories", ["name"])
+
+    op.create_table(
+        "expenses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("employee_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("company_id", sa.Integer(), sa.ForeignKey("companies.id")),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("currency", sa.String(3), nullable=False),
+        sa.Column("amount_in_company_currency", sa.Float(), nullable=False),
+        sa.Column("category", sa.String(), nullable=True),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("date", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("status", sa.Enum("PENDING", "APPROVED", "REJECTED", name="expensestatus")),
+    )
+    op.create_index("ix_expenses_id", "expenses", ["id"])
+
+    op.create_table(
+        "approval_rules",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("company_id", sa.Integer(), sa.ForeignKey("companies.id")),
+        sa.Column("name", sa.String()),
+        sa.Column("is_sequential", sa.Boolean()),
+        sa.Column("rules", sa.JSON()),
+    )
+    op.create_index("ix_approval_rules_id", "approval_rules", ["id"])
+
+    op.create_table(
+        "approval_requests",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("expense_id", sa.Integer(), sa.ForeignKey("expenses.id")),
+        sa.Column("approver_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("step", sa.Integer()),
+        sa.Column("approved", sa.Boolean(), nullable=True),
+        sa.Column("comments", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_approval_requests_id", "approval_requests", ["id"])
+
+    op.create_table(
+        "audit_logs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("action", sa.String()),
+        sa.Column("details", sa.JSON()),
+        sa.Column("timestamp", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_audit_logs_id", "audit_logs", ["id"])
+
+def downgrade():
+    for table in ("audit_logs", "approval_requests", "approval_rules", "expenses", "expense_categories", "users", "companies"):
+        op.drop_table(table)
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP TYPE IF EXISTS expensestatus")
+        op.execute("DROP TYPE IF EXISTS role")
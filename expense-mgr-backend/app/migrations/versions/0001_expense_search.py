@@ -0,0 +1,30 @@
+"""Full-text search over expense categories and descriptions
+
+Adds expenses.search_vector, the trigger that maintains it, a backfill of existing
+rows and its GIN index. The DDL is shared with create_schema() via app.services.search.
+SQLite databases get their FTS5 table from create_schema() instead.
+
+Revision ID: 0001_expense_search
+Revises: 0000_baseline
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+from app.services.search import POSTGRES_DDL, POSTGRES_DROP
+
+revision = "0001_expense_search"
+down_revision = "0000_baseline"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for statement in POSTGRES_DDL:
+        op.execute(statement)
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for statement in POSTGRES_DROP:
+        op.execute(statement)
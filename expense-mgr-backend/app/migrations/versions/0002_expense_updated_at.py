@@ -0,0 +1,24 @@
+"""Track when each expense last changed
+
+Report caching keys finished exports on a company's latest expense change, which
+expenses.updated_at plus its (company_id, updated_at) index make an index lookup.
+
+Revision ID: 0002_expense_updated_at
+Revises: 0001_expense_search
+Create Date: 2026-10-19
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0002_expense_updated_at"
+down_revision = "0001_expense_search"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("expenses", sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=True))
+    op.create_index("ix_expenses_company_id_updated_at", "expenses", ["company_id", "updated_at"])
+
+def downgrade():
+    op.drop_index("ix_expenses_company_id_updated_at", table_name="expenses")
+    op.drop_column("expenses", "updated_at")
@@ -0,0 +1,21 @@
+"""Store users' mobile numbers for SMS password resets
+
+Revision ID: 0003_user_mobile_number
+Revises: 0002_expense_updated_at
+Create Date: 2026-10-19
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0003_user_mobile_number"
+down_revision = "0002_expense_updated_at"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("users", sa.Column("mobile_number", sa.String(), nullable=True))
+    op.create_index("ix_users_mobile_number", "users", ["mobile_number"], unique=True)
+
+def downgrade():
+    op.drop_index("ix_users_mobile_number", table_name="users")
+    op.drop_column("users", "mobile_number")
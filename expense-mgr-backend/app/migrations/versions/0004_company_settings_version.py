@@ -0,0 +1,19 @@
+"""Version company settings so per-worker tenant caches can be invalidated
+
+Revision ID: 0004_company_settings_version
+Revises: 0003_user_mobile_number
+Create Date: 2026-10-19
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0004_company_settings_version"
+down_revision = "0003_user_mobile_number"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("companies", sa.Column("settings_version", sa.Integer(), nullable=False, server_default="0"))
+
+def downgrade():
+    op.drop_column("companies", "settings_version")
@@ -0,0 +1,22 @@
+"""Index audit log queries and retention pruning by time
+
+Revision ID: 0005_audit_log_indexes
+Revises: 0004_company_settings_version
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0005_audit_log_indexes"
+down_revision = "0004_company_settings_version"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index("ix_audit_logs_timestamp", "audit_logs", ["timestamp"])
+    op.create_index("ix_audit_logs_user_id_timestamp", "audit_logs", ["user_id", "timestamp"])
+    op.create_index("ix_audit_logs_action_timestamp", "audit_logs", ["action", "timestamp"])
+
+def downgrade():
+    op.drop_index("ix_audit_logs_action_timestamp", table_name="audit_logs")
+    op.drop_index("ix_audit_logs_user_id_timestamp", table_name="audit_logs")
+    op.drop_index("ix_audit_logs_timestamp", table_name="audit_logs")
@@ -0,0 +1,27 @@
+"""Keyset pagination indexes for the expense and pending-approval listings
+
+Revision ID: 0006_listing_indexes
+Revises: 0005_audit_log_indexes
+Create Date: 2026-10-19
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0006_listing_indexes"
+down_revision = "0005_audit_log_indexes"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index("ix_expenses_employee_id_id", "expenses", ["employee_id", "id"])
+    op.create_index("ix_expenses_company_id_id", "expenses", ["company_id", "id"])
+    # Only undecided requests are ever listed
+    op.create_index(
+        "ix_approval_requests_approver_pending", "approval_requests", ["approver_id", "id"],
+        postgresql_where=sa.text("approved IS NULL"), sqlite_where=sa.text("approved IS NULL"),
+    )
+
+def downgrade():
+    op.drop_index("ix_approval_requests_approver_pending", table_name="approval_requests")
+    op.drop_index("ix_expenses_company_id_id", table_name="expenses")
+    op.drop_index("ix_expenses_employee_id_id", table_name="expenses")
@@ -0,0 +1,23 @@
+"""Persist approval SLA state so reminders and escalations survive restarts
+
+Revision ID: 0007_approval_sla
+Revises: 0006_listing_indexes
+Create Date: 2026-10-19
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0007_approval_sla"
+down_revision = "0006_listing_indexes"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("approval_requests", sa.Column("reminded_at", sa.DateTime(), nullable=True))
+    op.add_column("approval_requests", sa.Column("escalated_at", sa.DateTime(), nullable=True))
+    op.add_column("approval_requests", sa.Column("escalation_level", sa.Integer(), nullable=True))
+
+def downgrade():
+    op.drop_column("approval_requests", "escalation_level")
+    op.drop_column("approval_requests", "escalated_at")
+    op.drop_column("approval_requests", "reminded_at")
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Boolean, Float, JSON, DateTime, func
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Boolean, Float, JSON, DateTime, Index, func, text
 from sqlalchemy.orm import relationship
 from .database import Base
+from datetime import datetime
 from enum import Enum as PyEnum
 
 class Role(PyEnum):
@@ -19,14 +20,19 @@ class Company(Base):
     name = Column(String, index=True)
     currency = Column(String(3))
     created_at = Column(DateTime, server_default=func.now())
+    # Bumped with every change to the company or its approval rules (see services.tenant_cache)
+    settings_version = Column(Integer, nullable=False, default=0, server_default="0")
     users = relationship("User", back_populates="company")
     expenses = relationship("Expense", back_populates="company")
+    categories = relationship("ExpenseCategory", back_populates="company")
+    approval_rules = relationship("ApprovalRule", back_populates="company")
 
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True)
     email = Column(String, unique=True, index=True)
+    mobile_number = Column(String, unique=True, index=True, nullable=True)
     hashed_password = Column(String)
     role = Column(Enum(Role), default=Role.EMPLOYEE)
     company_id = Column(Integer, ForeignKey("companies.id"))
@@ -38,6 +44,7 @@ class User(Base):
     employees = relationship("User", back_populates="manager")
     expenses = relationship("Expense", back_populates="employee")
     approvals = relationship("ApprovalRequest", back_populates="approver")
+    audit_logs = relationship("AuditLog", back_populates="user")
 
 class ExpenseCategory(Base):
     __tablename__ = "expense_categories"
@@ -45,10 +52,16 @@ class ExpenseCategory(Base):
     name = Column(String, index=True)
     company_id = Column(Integer, ForeignKey("companies.id"))
     company = relationship("Company", back_populates="categories")
-    expenses = relationship("Expense", back_populates="category")
 
 class Expense(Base):
     __tablename__ = "expenses"
+    # Keyset pagination for the per-employee and per-company listings
+    __table_args__ = (
+        Index("ix_expenses_employee_id_id", "employee_id", "id"),
+        Index("ix_expenses_company_id_id", "company_id", "id"),
+        # Lets report caching read a company's latest change without touching the table
+        Index("ix_expenses_company_id_updated_at", "company_id", "updated_at"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(Integer, ForeignKey("users.id"))
     company_id = Column(Integer, ForeignKey("companies.id"))
@@ -59,9 +72,10 @@ class Expense(Base):
     description = Column(String, nullable=True)
     date = Column(DateTime, server_default=func.now())
     status = Column(Enum(ExpenseStatus), default=ExpenseStatus.PENDING)
+    # Set client side for sub-second precision (SQLite's CURRENT_TIMESTAMP is whole seconds)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, server_default=func.now())
     employee = relationship("User", back_populates="expenses")
     company = relationship("Company", back_populates="expenses")
-    category = relationship("ExpenseCategory", back_populates="expenses")
     approvals = relationship("ApprovalRequest", back_populates="expense")
 
 class ApprovalRule(Base):
@@ -75,18 +89,36 @@ class ApprovalRule(Base):
 
 class ApprovalRequest(Base):
     __tablename__ = "approval_requests"
+    # Only undecided requests are ever listed, so keep the index to those
+    __table_args__ = (
+        Index(
+            "ix_approval_requests_approver_pending", "approver_id", "id",
+            postgresql_where=text("approved IS NULL"), sqlite_where=text("approved IS NULL"),
+        ),
+    )
     id = Column(Integer, primary_key=True, index=True)
     expense_id = Column(Integer, ForeignKey("expenses.id"))
     approver_id = Column(Integer, ForeignKey("users.id"))
     step = Column(Integer, default=1)
     approved = Column(Boolean, nullable=True)
     comments = Column(String, nullable=True)
-    created_at = Column(DateTime, server_default=func.now())
+    # Set client side in UTC, the clock the SLA scheduler runs on (Postgres' now() follows the session time zone)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now())
+    # SLA state, persisted so the scheduler picks up where it left off after a restart
+    reminded_at = Column(DateTime, nullable=True)
+    escalated_at = Column(DateTime, nullable=True)
+    escalation_level = Column(Integer, default=0)
     expense = relationship("Expense", back_populates="approvals")
     approver = relationship("User", back_populates="approvals")
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    # Every query and retention prune is a time range, optionally narrowed by user or action
+    __table_args__ = (
+        Index("ix_audit_logs_timestamp", "timestamp"),
+        Index("ix_audit_logs_user_id_timestamp", "user_id", "timestamp"),
+        Index("ix_audit_logs_action_timestamp", "action", "timestamp"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     action = Column(String)
@@ -1,19 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from app.schemas import ApprovalRule, ApprovalRuleCreate, Expense
-from app.crud import create_approval_rule, get_approval_rules, get_all_expenses, update_expense_status
+from typing import List, Optional
+from app.schemas import ApprovalRule, ApprovalRuleCreate, Company, CompanyUpdate, Expense, ExpenseList, ExpenseRow, ReportCreate, ReportJob
+from app.crud import create_approval_rule, get_all_expenses, update_company, update_expense_status
 from app.deps import get_db, is_admin
+from app.models import User as UserModel, ExpenseStatus
+from app.serialization import rows_response
+from app.services.approval_workflow import close_open_approvals
+from app.services.reports import DONE, download_response, report_manager, xlsx_available
+from app.services.tenant_cache import tenant_cache
 
 router = APIRouter()
 
+@router.patch("/company", response_model=Company)
+async def update_company_settings(
+    company_in: CompanyUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(is_admin)
+):
+    updates = company_in.model_dump(exclude_unset=True)
+    if "currency" in updates:
+        updates["currency"] = updates["currency"].upper()
+    return await update_company(db, current_user.company_id, updates)
+
 @router.post("/rules", response_model=ApprovalRule)
-async def create_approval_rule(
+async def create_company_rule(
     rule_in: ApprovalRuleCreate,
     db: AsyncSession = Depends(get_db),
     current_user: UserModel = Depends(is_admin)
 ):
-    new_rule = await create_approval_rule(db, rule_in.dict(), current_user.company_id)
+    new_rule = await create_approval_rule(db, rule_in.model_dump(), current_user.company_id)
     return new_rule
 
 @router.get("/rules", response_model=List[ApprovalRule])
@@ -21,14 +37,19 @@ async def get_company_rules(
     db: AsyncSession = Depends(get_db),
     current_user: UserModel = Depends(is_admin)
 ):
-    return await get_approval_rules(db, current_user.company_id)
+    tenant = await tenant_cache.get(db, current_user.company_id)
+    return tenant.rules if tenant else []
 
-@router.get("/expenses", response_model=List[Expense])
+@router.get("/expenses", response_model=List[ExpenseRow])
 async def view_all_expenses(
+    status: Optional[ExpenseStatus] = None,
+    before_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
     db: AsyncSession = Depends(get_db),
     current_user: UserModel = Depends(is_admin)
 ):
-    return await get_all_expenses(db, current_user.company_id)
+    rows = await get_all_expenses(db, current_user.company_id, status, before_id, limit)
+    return rows_response(ExpenseList, rows)
 
 @router.patch("/expenses/{expense_id}", response_model=Expense)
 async def override_expense(
@@ -38,4 +59,45 @@ async def override_expense(
     current_user: UserModel = Depends(is_admin)
 ):
     updated_expense = await update_expense_status(db, expense_id, status, current_user.company_id)
-    return updated_expense
\ No newline at end of file
+    await close_open_approvals(db, expense_id, status)
+    return updated_expense
+
+@router.post("/reports", response_model=ReportJob, status_code=202)
+async def create_expense_report(
+    report_in: ReportCreate,
+    current_user: UserModel = Depends(is_admin)
+):
+    """
+    Start exporting the company's expenses to CSV or XLSX; poll GET /admin/reports/{id}
+    for progress. Asking for the same export again before any expense changes returns the
+    finished report straight away.
+    """
+    if report_in.format == "xlsx" and not xlsx_available():
+        raise HTTPException(status_code=400, detail="XLSX export is not available on this server")
+    return await report_manager.submit(
+        current_user.company_id, report_in.format, report_in.status, report_in.since, report_in.until
+    )
+
+@router.get("/reports/{report_id}", response_model=ReportJob)
+async def get_expense_report(
+    report_id: str,
+    current_user: UserModel = Depends(is_admin)
+):
+    job = report_manager.get(current_user.company_id, report_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return job
+
+@router.get("/reports/{report_id}/download")
+async def download_expense_report(
+    report_id: str,
+    request: Request,
+    current_user: UserModel = Depends(is_admin)
+):
+    """Download a finished report. Supports Range requests for resuming large files."""
+    job = report_manager.get(current_user.company_id, report_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    if job.status != DONE:
+        raise HTTPException(status_code=409, detail=f"Report is {job.status}")
+    return download_response(report_manager, job, request)
@@ -1,19 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from app.schemas import ApprovalRequest, ApprovalRequestBase
-from app.crud import get_pending_approvals, update_approval_request
-from app.deps import get_db, is_manager_or_admin
-from app.services.approval_workflow import evaluate_approval
+from typing import List, Optional
+from app.auth import create_stream_token
+from app.config import settings
+from app.schemas import ApprovalRequest, ApprovalRequestBase, PendingApprovalList, PendingApprovalRow, StreamToken
+from app.crud import get_approval_request, get_pending_approvals, update_approval_request
+from app.deps import get_db, is_manager_or_admin, is_stream_manager_or_admin
+from app.models import User as UserModel
+from app.serialization import rows_response
+from app.services.approval_workflow import evaluate_approval, publish_decision
+from app.services.audit import record_event
+from app.services.events import event_stream
 
 router = APIRouter()
 
-@router.get("/pending", response_model=List[ApprovalRequest])
+@router.get("/pending", response_model=List[PendingApprovalRow])
 async def view_pending_approvals(
+    before_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
     db: AsyncSession = Depends(get_db),
     current_user: UserModel = Depends(is_manager_or_admin)
 ):
-    return await get_pending_approvals(db, current_user.id)
+    rows = await get_pending_approvals(db, current_user.id, before_id, limit)
+    return rows_response(PendingApprovalList, rows)
+
+@router.post("/stream-token", response_model=StreamToken)
+async def issue_stream_token(current_user: UserModel = Depends(is_manager_or_admin)):
+    """
+    Short-lived token for browsers, whose EventSource can't send an Authorization header:
+    `new EventSource("/approvals/stream?token=" + token)`. It only opens the stream, and is
+    checked when connecting, so fetch a fresh one before reconnecting after it expires.
+    """
+    return {"token": create_stream_token(current_user.username), "expires_in": settings.STREAM_TOKEN_EXPIRE_SECONDS}
+
+@router.get("/stream")
+async def stream_pending_approvals(
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    current_user: UserModel = Depends(is_stream_manager_or_admin)
+):
+    """
+    Server-Sent Events feed of changes to the caller's pending approvals, so clients
+    load GET /approvals/pending once and then apply deltas instead of polling:
+    `approval.created` carries a new pending row, `approval.decided` and
+    `approval.escalated` remove one, `approval.reminder` flags an overdue one,
+    and `inbox.resync` means refetch the listing.
+    Reconnecting with Last-Event-ID resumes from the last event received.
+    Authenticate with the usual bearer header or, from a browser, `?token=` (see /stream-token).
+    """
+    return StreamingResponse(
+        event_stream(current_user.id, last_event_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.patch("/{approval_id}", response_model=ApprovalRequest)
 async def approve_or_reject(
@@ -25,6 +65,14 @@ async def approve_or_reject(
     approval = await get_approval_request(db, approval_id)
     if not approval or approval.approver_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized for this approval")
-    updated_approval = await update_approval_request(db, approval_id, approval_in.dict(exclude_unset=True))
+    if approval.approved is not None:
+        raise HTTPException(status_code=409, detail="Approval request has already been decided")
+    updated_approval = await update_approval_request(db, approval_id, approval_in.model_dump(exclude_unset=True))
+    if updated_approval.approved is None:
+        # Only a comment, the request stays in the approver's inbox
+        record_event("approval_comment", current_user.id, approval_id=approval_id, expense_id=approval.expense_id)
+        return updated_approval
+    record_event("approval_decision", current_user.id, approval_id=approval_id, expense_id=approval.expense_id, approved=updated_approval.approved)
+    await publish_decision(updated_approval)
     await evaluate_approval(db, approval.expense_id)
-    return updated_approval
\ No newline at end of file
+    return updated_approval
@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas import AuditLog
+from app.crud import get_audit_logs
+from app.database import get_db
+from app.deps import get_current_admin_user
+from app.models import User as UserModel
+
+router = APIRouter()
+
+@router.get("/", response_model=List[AuditLog])
+async def list_audit_logs(
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_admin_user)
+):
+    """
+    Audit events for the admin's company, newest first.
+    Events are written in batches, so the last few seconds may not be visible yet.
+    """
+    return await get_audit_logs(db, current_user.company_id, user_id, action, since, until, limit)
@@ -1,29 +1,85 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Literal, Optional
 from .. import schemas, auth
-from ..crud import create_expense, get_expenses_for_user  # <-- FIXED: Renamed the function here
+from ..crud import create_expense, get_expenses_for_user, search_expenses
 from ..database import get_db
+from ..models import ExpenseStatus, Role, User as UserModel
+from ..serialization import rows_response
+from ..services.approval_workflow import start_approval
+from ..services.currency_service import convert_currency
+from ..services.search import search_index
+from ..services.tenant_cache import tenant_cache
 
 router = APIRouter()
 
 @router.post("/", response_model=schemas.Expense)
 async def create_new_expense(
-    expense: schemas.ExpenseCreate, 
-    db: AsyncSession = Depends(get_db), 
-    current_user: schemas.User = Depends(auth.get_current_user)
+    expense: schemas.ExpenseCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(auth.get_current_user)
 ):
     """
     Create a new expense for the currently logged-in user.
     """
-    return await create_expense(db=db, expense=expense, user_id=current_user.id)
+    tenant = await tenant_cache.get(db, current_user.company_id)
+    amount_in_company_currency = expense.amount
+    if tenant and tenant.currency and expense.currency.upper() != tenant.currency:
+        try:
+            amount_in_company_currency = await run_in_threadpool(
+                convert_currency, expense.amount, expense.currency, tenant.currency
+            )
+        except RuntimeError as e:
+            raise HTTPException(status_code=502, detail=str(e))
+    new_expense = await create_expense(db, {
+        **expense.model_dump(),
+        "currency": expense.currency.upper(),
+        "amount_in_company_currency": amount_in_company_currency,
+        "employee_id": current_user.id,
+        "company_id": current_user.company_id,
+    })
+    await start_approval(db, new_expense, current_user)
+    return new_expense
 
-@router.get("/", response_model=List[schemas.Expense])
+@router.get("/", response_model=List[schemas.ExpenseRow])
 async def read_user_expenses(
-    db: AsyncSession = Depends(get_db), 
-    current_user: schemas.User = Depends(auth.get_current_user)
+    before_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(auth.get_current_user)
 ):
     """
-    Retrieve all expenses for the currently logged-in user.
+    Retrieve the currently logged-in user's expenses, newest first.
+    Pass the last id of a page as `before_id` to get the next one.
     """
-    return await get_expenses_for_user(db=db, user_id=current_user.id)
\ No newline at end of file
+    rows = await get_expenses_for_user(db, current_user.id, before_id, limit)
+    return rows_response(schemas.ExpenseList, rows)
+
+@router.get("/search", response_model=List[schemas.ExpenseSearchRow])
+async def search_user_expenses(
+    q: str = Query(..., min_length=1, max_length=200),
+    status: Optional[ExpenseStatus] = None,
+    employee_id: Optional[int] = None,
+    order: Literal["rank", "recent"] = "rank",
+    before_id: Optional[int] = None,
+    before_rank: Optional[float] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(auth.get_current_user)
+):
+    """
+    Search expense categories and descriptions; every word of `q` matches as a prefix.
+    Admins search their whole company (optionally one `employee_id`), everyone else their own expenses.
+    Results come best match first: pass the last row's `rank` and `id` as `before_rank` and
+    `before_id` to get the next page. With `order=recent` they come newest first and page on
+    `before_id` alone, like GET /expenses/.
+    """
+    if not search_index.available:
+        raise HTTPException(status_code=503, detail="Expense search is not available on this server")
+    if current_user.role != Role.ADMIN:
+        employee_id = current_user.id
+    rows = await search_expenses(
+        db, current_user.company_id, q, employee_id, status, order, before_id, before_rank, limit
+    )
+    return rows_response(schemas.ExpenseSearchList, rows)
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from app.schemas import User, UserCreate
-from app.crud import create_user, get_users_by_company, get_user, update_user
+from typing import List, Optional
+from app.schemas import User, UserCreate, UserList, UserRow
+from app.crud import create_user, get_user_by_username, get_users_by_company, get_user, update_user
 from app.deps import get_db, is_admin
-from app.models import User as UserModel
-from app.auth import get_password_hash
+from app.models import User as UserModel, Role
+from app.auth import get_password_hash_async
+from app.serialization import rows_response
+from app.services.audit import record_event
 
 router = APIRouter()
 
@@ -18,22 +20,27 @@ async def create_new_user(
     user = await get_user_by_username(db, user_in.username)
     if user:
         raise HTTPException(status_code=400, detail="Username already registered")
-    hashed_password = get_password_hash(user_in.password)
+    hashed_password = await get_password_hash_async(user_in.password)
     new_user = await create_user(db, {
         "username": user_in.username,
         "email": user_in.email,
+        "mobile_number": user_in.mobile_number,
         "hashed_password": hashed_password,
         "role": user_in.role,
         "company_id": current_user.company_id
     })
+    record_event("user_created", current_user.id, target_user_id=new_user.id, role=new_user.role.value)
     return new_user
 
-@router.get("/", response_model=List[User])
+@router.get("/", response_model=List[UserRow])
 async def get_users(
+    before_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
     db: AsyncSession = Depends(get_db),
     current_user: UserModel = Depends(is_admin)
 ):
-    return await get_users_by_company(db, current_user.company_id)
+    rows = await get_users_by_company(db, current_user.company_id, before_id, limit)
+    return rows_response(UserList, rows)
 
 @router.patch("/{user_id}", response_model=User)
 async def update_user_role(
@@ -52,4 +59,5 @@ async def update_user_role(
     if manager_id:
         updates["manager_id"] = manager_id
     updated_user = await update_user(db, user_id, updates)
-    return updated_user
\ No newline at end of file
+    record_event("role_change", current_user.id, target_user_id=user_id, role=updated_user.role.value, manager_id=updated_user.manager_id)
+    return updated_user
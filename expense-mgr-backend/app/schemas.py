@@ -1,12 +1,14 @@
-from pydantic import BaseModel, ConfigDict, EmailStr
-from typing import Optional, List, Any
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, TypeAdapter
+from typing import Optional, List, Any, Literal
+from typing_extensions import TypedDict
 from datetime import datetime
 from .models import Role, ExpenseStatus
 
 # --- User Schemas ---
 class UserBase(BaseModel):
-    name: str
+    username: str
     email: EmailStr
+    mobile_number: Optional[str] = None
     role: Role
 
 class UserCreate(UserBase):
@@ -16,33 +18,64 @@ class User(UserBase):
     id: int
     manager_id: Optional[int] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+# --- Company Schemas ---
+class CompanyUpdate(BaseModel):
+    # Either can be left out, but neither can be cleared: an explicit null is rejected
+    name: str = Field(None, min_length=1)
+    currency: str = Field(None, pattern=r"^[A-Za-z]{3}$", description="ISO 4217 code")
+
+class Company(BaseModel):
+    id: int
+    name: str
+    currency: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
 
 # --- Expense Schemas ---
 class ExpenseBase(BaseModel):
-    name: str
     amount: float
-    category: str
+    currency: str
+    category: Optional[str] = None
+    description: Optional[str] = None
 
 class ExpenseCreate(ExpenseBase):
     pass
 
 class Expense(ExpenseBase):
     id: int
-    owner_id: int
+    employee_id: int
+    company_id: int
+    amount_in_company_currency: float
     status: ExpenseStatus
     date: datetime
-    owner: User
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+# --- Approval Request Schemas ---
+class ApprovalRequestBase(BaseModel):
+    approved: Optional[bool] = None
+    comments: Optional[str] = None
+
+class ApprovalRequest(ApprovalRequestBase):
+    id: int
+    expense_id: int
+    approver_id: int
+    step: int
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
 
 # --- Token Schema for Authentication ---
 class Token(BaseModel):
     access_token: str
     token_type: str
 
+class StreamToken(BaseModel):
+    token: str
+    expires_in: int
+
 class TokenData(BaseModel):
     email: Optional[str] = None
 
@@ -51,21 +84,91 @@ class PasswordResetRequest(BaseModel):
     username: str
 
 class PasswordReset(BaseModel):
-    token: str
+    username: str
+    code: str
     new_password: str
 
-# --- FIX IS HERE: Approval Rule Schema ---
+# --- Approval Rule Schemas ---
 class ApprovalRuleBase(BaseModel):
-    # This is an example structure, adjust to your actual fields
     name: str
-    conditions: dict[str, Any]  # Using Any from typing is better practice
+    is_sequential: bool = True
+    rules: dict[str, Any]
 
-    # This configuration tells Pydantic to allow complex types like 'any'
-    model_config = ConfigDict(arbitrary_types_allowed=True)
+class ApprovalRuleCreate(ApprovalRuleBase):
+    pass
 
 class ApprovalRule(ApprovalRuleBase):
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+# --- Audit Log Schemas ---
+class AuditLog(BaseModel):
+    id: int
+    user_id: Optional[int] = None
+    action: str
+    details: Optional[dict[str, Any]] = None
+    timestamp: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+# --- Report Schemas ---
+class ReportCreate(BaseModel):
+    format: Literal["csv", "xlsx"] = "csv"
+    status: Optional[ExpenseStatus] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+
+class ReportJob(BaseModel):
+    id: str
+    format: str
+    status: str
+    rows_written: int
+    total_rows: Optional[int] = None
+    progress: float
+    cached: bool
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+# --- Listing Rows ---
+# Hot listings select plain columns instead of ORM objects and serialize the rows
+# straight to JSON through these precompiled adapters, skipping model validation.
+class UserRow(TypedDict):
+    id: int
+    username: str
+    email: str
+    role: Role
+    manager_id: Optional[int]
 
+class ExpenseRow(TypedDict):
+    id: int
+    employee_id: int
+    amount: float
+    currency: str
+    amount_in_company_currency: float
+    category: Optional[str]
+    description: Optional[str]
+    date: datetime
+    status: ExpenseStatus
+
+class ExpenseSearchRow(ExpenseRow):
+    rank: float
+
+class PendingApprovalRow(TypedDict):
+    id: int
+    expense_id: int
+    step: int
+    created_at: datetime
+    employee_id: int
+    amount: float
+    currency: str
+    category: Optional[str]
+    description: Optional[str]
+
+UserList = TypeAdapter(List[UserRow])
+ExpenseList = TypeAdapter(List[ExpenseRow])
+ExpenseSearchList = TypeAdapter(List[ExpenseSearchRow])
+PendingApprovalList = TypeAdapter(List[PendingApprovalRow])
@@ -0,0 +1,15 @@
+from typing import Sequence
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from sqlalchemy.engine import Row
+
+def rows_to_dicts(rows: Sequence[Row]) -> list[dict]:
+    # Row._asdict() is several times slower than zipping the column names once
+    if not rows:
+        return []
+    keys = [str(key) for key in rows[0]._fields]
+    return [dict(zip(keys, row)) for row in rows]
+
+def rows_response(adapter: TypeAdapter, rows: Sequence[Row]) -> Response:
+    """Serialize column rows with a precompiled adapter, bypassing FastAPI's response validation."""
+    return Response(adapter.dump_json(rows_to_dicts(rows)), media_type="application/json")
@@ -1,2 +1,63 @@
-# Placeholder files
-# Add test cases as needed
\ No newline at end of file
+from typing import Optional
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import ApprovalRequest, Expense, ExpenseStatus, User
+from .events import broker, pending_row
+from .sla_scheduler import sla_scheduler
+
+async def evaluate_approval(db: AsyncSession, expense_id: int) -> Optional[ExpenseStatus]:
+    """
+    Settle an expense once its approval requests allow it:
+    any rejection rejects it, all approvals approve it, otherwise it stays pending.
+    """
+    result = await db.execute(select(ApprovalRequest.approved).where(ApprovalRequest.expense_id == expense_id))
+    decisions = result.scalars().all()
+    if any(decision is False for decision in decisions):
+        status = ExpenseStatus.REJECTED
+    elif decisions and all(decision is True for decision in decisions):
+        status = ExpenseStatus.APPROVED
+    else:
+        return None
+    await db.execute(update(Expense).where(Expense.id == expense_id).values(status=status))
+    await db.commit()
+    return status
+
+async def start_approval(db: AsyncSession, expense: Expense, employee: User) -> Optional[ApprovalRequest]:
+    """Route a new expense to the employee's manager and push it into the manager's inbox."""
+    if not employee.manager_id or not employee.is_manager_approver:
+        return None
+    approval = ApprovalRequest(expense_id=expense.id, approver_id=employee.manager_id, step=1)
+    db.add(approval)
+    await db.commit()
+    await db.refresh(approval)
+    sla_scheduler.schedule(approval.id, approval.created_at)
+    await broker.publish(approval.approver_id, "approval.created", pending_row(approval, expense))
+    return approval
+
+async def publish_decision(approval: ApprovalRequest) -> None:
+    """Remove a decided approval from its approver's inbox (other tabs and devices included)."""
+    if approval.approved is None:
+        return  # still pending, its SLA clocks keep running
+    sla_scheduler.cancel(approval.id)
+    await broker.publish(approval.approver_id, "approval.decided", {"id": approval.id, "approved": approval.approved})
+
+async def close_open_approvals(db: AsyncSession, expense_id: int, status: ExpenseStatus) -> None:
+    """
+    After an admin settles an expense directly, settle its undecided approval requests the
+    same way so they leave their approvers' inboxes and stop being reminded and escalated.
+    """
+    if status == ExpenseStatus.PENDING:
+        return
+    result = await db.execute(
+        update(ApprovalRequest)
+        .where(ApprovalRequest.expense_id == expense_id, ApprovalRequest.approved.is_(None))
+        .values(
+            approved=status == ExpenseStatus.APPROVED,
+            comments=func.coalesce(ApprovalRequest.comments, "Settled by an administrator"),
+        )
+        .returning(ApprovalRequest.id, ApprovalRequest.approver_id, ApprovalRequest.approved)
+    )
+    closed = result.all()
+    await db.commit()
+    for approval in closed:
+        await publish_decision(approval)
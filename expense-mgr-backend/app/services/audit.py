@@ -0,0 +1,173 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import delete, insert
+from sqlalchemy.exc import InterfaceError, OperationalError
+from ..config import settings
+from ..database import AsyncSessionLocal
+from ..metrics import QUEUE_DEPTH
+from ..models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+PRUNE_INTERVAL = timedelta(days=1)
+# Errors meaning the database is unreachable, as opposed to refusing the rows themselves
+UNAVAILABLE_ERRORS = (OperationalError, InterfaceError, OSError)
+
+def month_start(moment: datetime, months_back: int = 0) -> datetime:
+    """First instant of the month `months_back` months before `moment`."""
+    month_index = moment.year * 12 + (moment.month - 1) - months_back
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+class AuditWriter:
+    """
+    Collects audit events in a bounded in-memory ring buffer and writes them in the background.
+    Recording an event never touches the database; a flush is triggered when `batch_size`
+    events are waiting or every `flush_interval` seconds, whichever comes first.
+    When the buffer is full the oldest events are dropped and counted in `dropped`.
+    A batch that fails `max_attempts` flushes in a row is written one event at a time; events
+    the database rejects are logged, dropped and counted in `rejected` so one bad row can't
+    block the log. While the database is unreachable events are kept and retried.
+    """
+
+    def __init__(
+        self,
+        capacity: int = settings.AUDIT_BUFFER_SIZE,
+        batch_size: int = settings.AUDIT_BATCH_SIZE,
+        flush_interval: float = settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+        retention_months: int = settings.AUDIT_RETENTION_MONTHS,
+        max_attempts: int = settings.AUDIT_MAX_ATTEMPTS,
+        session_factory=AsyncSessionLocal,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention_months = retention_months
+        self.max_attempts = max_attempts
+        self.session_factory = session_factory
+        self.dropped = 0
+        self.rejected = 0
+        # Consecutive failed flushes of the batch at the front of the buffer
+        self._failed_attempts = 0
+        self._buffer: deque = deque(maxlen=capacity)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_prune: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def record(self, action: str, user_id: Optional[int] = None, details: Optional[dict] = None) -> None:
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append({
+            "user_id": user_id,
+            "action": action,
+            "details": details or {},
+            "timestamp": datetime.utcnow(),
+        })
+        if self._wakeup is not None and len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            # Shutdown must carry on (engine disposal, executors); whatever is still buffered is lost
+            logger.error(f"Audit log flush failed at shutdown, {len(self._buffer)} events lost: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+                await self._maybe_prune()
+            except Exception as e:
+                logger.error(f"Audit log flush failed: {e}")
+
+    async def flush(self) -> int:
+        """Write everything currently buffered. Returns the number of rows inserted."""
+        written = 0
+        while self._buffer:
+            batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            if self._failed_attempts >= self.max_attempts:
+                written += await self._insert_rows(batch)
+            else:
+                try:
+                    await self._insert(batch)
+                except BaseException:
+                    # Put the batch back in order so the next flush (or shutdown) retries it
+                    self._failed_attempts += 1
+                    self._requeue(batch)
+                    raise
+                written += len(batch)
+            self._failed_attempts = 0
+        return written
+
+    async def _insert(self, rows: list) -> None:
+        async with self.session_factory() as session:
+            # A list of parameter sets is sent as multi-row INSERTs
+            await session.execute(insert(AuditLog.__table__), rows)
+            await session.commit()
+
+    async def _insert_rows(self, batch: list) -> int:
+        """Insert a batch that keeps failing one event at a time, dropping the events the database rejects."""
+        written = 0
+        for index, row in enumerate(batch):
+            try:
+                await self._insert([row])
+            except BaseException as e:
+                if not isinstance(e, Exception) or isinstance(e, UNAVAILABLE_ERRORS):
+                    self._requeue(batch[index:])
+                    raise
+                self.rejected += 1
+                logger.error(f"Dropping audit event {row['action']!r} for user {row['user_id']}, the database rejected it: {e}")
+            else:
+                written += 1
+        return written
+
+    def _requeue(self, batch: list) -> None:
+        # New events may have filled the buffer meanwhile; the batch holds the oldest, so it gives way
+        overflow = len(self._buffer) + len(batch) - self._buffer.maxlen
+        if overflow > 0:
+            self.dropped += overflow
+            batch = batch[overflow:]
+        self._buffer.extendleft(reversed(batch))
+
+    async def _maybe_prune(self) -> None:
+        if self.retention_months <= 0:
+            return
+        now = datetime.utcnow()
+        if self._last_prune and now - self._last_prune < PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        async with self.session_factory() as session:
+            await prune_audit_logs(session, month_start(now, self.retention_months))
+
+async def prune_audit_logs(db, before: datetime) -> int:
+    """Delete audit rows older than `before`, a range delete on the timestamp index."""
+    result = await db.execute(delete(AuditLog).where(AuditLog.timestamp < before))
+    await db.commit()
+    return result.rowcount
+
+audit_writer = AuditWriter()
+QUEUE_DEPTH.set_function(lambda: len(audit_writer), "audit")
+
+def record_event(action: str, user_id: Optional[int] = None, **details) -> None:
+    audit_writer.record(action, user_id=user_id, details=details)
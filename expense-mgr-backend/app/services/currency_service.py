@@ -2,6 +2,7 @@ import requests
 from typing import Dict
 import logging
 from ..config import settings
+from ..metrics import track_http
 
 logger = logging.getLogger(__name__)
 
@@ -10,7 +11,8 @@ EXCHANGE_RATE_URL = settings.EXCHANGE_API_URL
 
 def get_countries_and_currencies() -> Dict[str, Dict[str, str]]:
     try:
-        resp = requests.get(REST_COUNTRIES_URL, timeout=10)
+        with track_http("countries"):
+            resp = requests.get(REST_COUNTRIES_URL, timeout=10)
         resp.raise_for_status()
         data = resp.json()
 
@@ -34,7 +36,8 @@ def convert_currency(amount: float, from_currency: str, to_currency: str) -> flo
     try:
         url = EXCHANGE_RATE_URL.format(base=from_currency.upper())
         headers = {"Authorization": f"Bearer {settings.EXCHANGE_API_KEY}"} if settings.EXCHANGE_API_KEY else {}
-        resp = requests.get(url, timeout=10)
+        with track_http("exchange_rates"):
+            resp = requests.get(url, timeout=10)
         resp.raise_for_status()
         rates = resp.json().get("rates", {})
         if to_currency.upper() not in rates:
@@ -0,0 +1,246 @@
+import asyncio
+import itertools
+import logging
+import secrets
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Set
+import orjson
+from ..config import settings
+from ..metrics import QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Event:
+    """One approval-inbox delta addressed to a single user, or a worker broadcast when `user_id` is None."""
+    user_id: Optional[int]
+    type: str
+    data: dict
+    id: str = ""
+
+    def to_sse(self) -> bytes:
+        return b"id: %s\nevent: %s\ndata: %s\n\n" % (self.id.encode(), self.type.encode(), orjson.dumps(self.data))
+
+# Tells a client its view may be stale (buffer overflow or resume point too old) and it should refetch
+RESYNC = "inbox.resync"
+
+class EventBackend(ABC):
+    """
+    Transport between workers. `publish` assigns the event id and must eventually hand the
+    event to the `deliver` callback of every worker's broker, including the publishing one.
+    Ids must not repeat across restarts, or a reconnecting client could resume from the wrong event.
+    A shared backend (Redis streams, Postgres LISTEN/NOTIFY) lets several workers share events.
+    """
+
+    @abstractmethod
+    async def start(self, deliver: Callable[[Event], None]) -> None:
+        ...
+
+    @abstractmethod
+    async def publish(self, event: Event) -> None:
+        ...
+
+    async def stop(self) -> None:
+        pass
+
+class InMemoryBackend(EventBackend):
+    """
+    Single-process backend, used for local runs and tests. Event ids are "<boot>-<n>" with a
+    random `boot` per instance, so an id a client kept from an earlier process never matches.
+    """
+
+    def __init__(self):
+        self._boot = secrets.token_hex(4)
+        self._ids = itertools.count(1)
+        self._deliver: Optional[Callable[[Event], None]] = None
+
+    async def start(self, deliver: Callable[[Event], None]) -> None:
+        self._deliver = deliver
+
+    async def publish(self, event: Event) -> None:
+        event.id = f"{self._boot}-{next(self._ids)}"
+        if self._deliver is not None:
+            self._deliver(event)
+
+@dataclass(eq=False)
+class Subscription:
+    user_id: int
+    queue: asyncio.Queue
+    overflowed: bool = False
+
+    async def get(self) -> Event:
+        event = await self.queue.get()
+        if event.type == RESYNC:
+            self.overflowed = False
+        return event
+
+@dataclass
+class _UserChannel:
+    subscriptions: Set[Subscription] = field(default_factory=set)
+    recent: deque = field(default_factory=deque)
+    # When the last event arrived or the last subscriber left
+    touched_at: float = 0.0
+
+class ApprovalBroker:
+    """
+    Fans approval events out to the SSE streams of the user they concern.
+    Each subscriber has a bounded queue; a subscriber that falls behind loses its backlog
+    and gets a single resync event instead of blocking publishers or growing without bound.
+    The last `replay_size` events per user are kept so reconnecting clients can resume from
+    their Last-Event-ID. A user's channel is forgotten once nobody is subscribed and nothing
+    happened for `replay_ttl` seconds; resuming after that gets a resync.
+
+    Events without a user are broadcasts between workers (cache invalidations and the like);
+    they go to the callbacks registered with `listen` instead of any stream.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[EventBackend] = None,
+        buffer_size: int = settings.EVENTS_SUBSCRIBER_BUFFER,
+        replay_size: int = settings.EVENTS_REPLAY_SIZE,
+        replay_ttl: float = settings.EVENTS_REPLAY_TTL_SECONDS,
+        clock=time.monotonic,
+    ):
+        self.backend = backend or InMemoryBackend()
+        self.buffer_size = buffer_size
+        self.replay_size = replay_size
+        self.replay_ttl = replay_ttl
+        self.clock = clock
+        self._channels: Dict[int, _UserChannel] = {}
+        self._last_sweep = clock()
+        self._listeners: Dict[str, List[Callable[[dict], None]]] = {}
+
+    def set_backend(self, backend: EventBackend) -> None:
+        """Swap the transport; call before `start`."""
+        self.backend = backend
+
+    async def start(self) -> None:
+        await self.backend.start(self._deliver)
+
+    async def stop(self) -> None:
+        await self.backend.stop()
+
+    def buffered(self) -> int:
+        return sum(sub.queue.qsize() for channel in self._channels.values() for sub in channel.subscriptions)
+
+    async def publish(self, user_id: int, event_type: str, data: dict) -> None:
+        try:
+            await self.backend.publish(Event(user_id=user_id, type=event_type, data=data))
+        except Exception as e:
+            # Events are a latency optimization; clients still have the REST listing
+            logger.error(f"Failed to publish {event_type} for user {user_id}: {e}")
+
+    def listen(self, event_type: str, callback: Callable[[dict], None]) -> None:
+        """Call `callback(data)` for every broadcast of `event_type`, from any worker."""
+        self._listeners.setdefault(event_type, []).append(callback)
+
+    async def broadcast(self, event_type: str, data: dict) -> None:
+        try:
+            await self.backend.publish(Event(user_id=None, type=event_type, data=data))
+        except Exception as e:
+            logger.error(f"Failed to broadcast {event_type}: {e}")
+
+    def _channel(self, user_id: int) -> _UserChannel:
+        channel = self._channels.get(user_id)
+        if channel is None:
+            channel = self._channels[user_id] = _UserChannel(recent=deque(maxlen=self.replay_size), touched_at=self.clock())
+        return channel
+
+    def _sweep(self) -> None:
+        """Forget channels with no subscribers whose events are too old to resume from."""
+        now = self.clock()
+        # Checking every channel is cheap but not free, so do it at most ten times per TTL
+        if now - self._last_sweep < self.replay_ttl / 10:
+            return
+        self._last_sweep = now
+        cutoff = now - self.replay_ttl
+        idle = [user_id for user_id, channel in self._channels.items() if not channel.subscriptions and channel.touched_at < cutoff]
+        for user_id in idle:
+            del self._channels[user_id]
+
+    def _deliver(self, event: Event) -> None:
+        if event.user_id is None:
+            for callback in self._listeners.get(event.type, ()):
+                try:
+                    callback(event.data)
+                except Exception as e:
+                    logger.error(f"{event.type} listener failed: {e}")
+            return
+        self._sweep()
+        channel = self._channel(event.user_id)
+        channel.recent.append(event)
+        channel.touched_at = self.clock()
+        for sub in channel.subscriptions:
+            self._offer(sub, event)
+
+    def _offer(self, sub: Subscription, event: Event) -> None:
+        if sub.overflowed:
+            return
+        try:
+            sub.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Drop the backlog; the client refetches once it sees the resync
+            while not sub.queue.empty():
+                sub.queue.get_nowait()
+            sub.overflowed = True
+            sub.queue.put_nowait(Event(user_id=sub.user_id, type=RESYNC, data={"reason": "overflow"}, id=event.id))
+
+    @contextmanager
+    def subscribe(self, user_id: int, last_event_id: Optional[str] = None) -> Iterator[Subscription]:
+        """Register a subscriber for `user_id` for the duration of the `with` block."""
+        sub = Subscription(user_id=user_id, queue=asyncio.Queue(maxsize=self.buffer_size))
+        channel = self._channel(user_id)
+        if last_event_id:
+            self._replay(sub, channel, last_event_id)
+        channel.subscriptions.add(sub)
+        try:
+            yield sub
+        finally:
+            channel.subscriptions.discard(sub)
+            channel.touched_at = self.clock()
+            if not channel.subscriptions and not channel.recent and self._channels.get(user_id) is channel:
+                del self._channels[user_id]
+
+    def _replay(self, sub: Subscription, channel: _UserChannel, last_event_id: str) -> None:
+        recent = list(channel.recent)
+        ids = [event.id for event in recent]
+        if last_event_id in ids:
+            for event in recent[ids.index(last_event_id) + 1:]:
+                self._offer(sub, event)
+        else:
+            # Resume point already evicted (or from another process lifetime)
+            self._offer(sub, Event(user_id=sub.user_id, type=RESYNC, data={"reason": "expired"}, id=ids[-1] if ids else last_event_id))
+
+def pending_row(approval, expense) -> dict:
+    """The approval as it appears in GET /approvals/pending (schemas.PendingApprovalRow)."""
+    return {
+        "id": approval.id,
+        "expense_id": approval.expense_id,
+        "step": approval.step,
+        "created_at": approval.created_at,
+        "employee_id": expense.employee_id,
+        "amount": expense.amount,
+        "currency": expense.currency,
+        "category": expense.category,
+        "description": expense.description,
+    }
+
+broker = ApprovalBroker()
+QUEUE_DEPTH.set_function(broker.buffered, "approval_events")
+
+async def event_stream(user_id: int, last_event_id: Optional[str], is_disconnected, heartbeat: float = settings.EVENTS_HEARTBEAT_SECONDS) -> AsyncIterator[bytes]:
+    """Server-Sent Events body: inbox deltas plus a comment line every `heartbeat` seconds."""
+    with broker.subscribe(user_id, last_event_id) as sub:
+        yield b"retry: 3000\n\n"
+        while not await is_disconnected():
+            try:
+                event = await asyncio.wait_for(sub.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            yield event.to_sse()
@@ -1,2 +1,27 @@
-# Placeholder files
-# Implement logic as needed
\ No newline at end of file
+import io
+import logging
+from functools import lru_cache
+from fastapi import UploadFile
+from ..executors import ocr_executor
+
+logger = logging.getLogger(__name__)
+
+# pytesseract and Pillow are heavy and only needed when a receipt is uploaded,
+# so they are imported on first use instead of at application startup.
+@lru_cache(maxsize=1)
+def _load_engine():
+    import pytesseract
+    from PIL import Image
+    logger.info("OCR engine loaded")
+    return pytesseract, Image
+
+def _extract_text(content: bytes) -> str:
+    pytesseract, Image = _load_engine()
+    with Image.open(io.BytesIO(content)) as image:
+        return pytesseract.image_to_string(image)
+
+async def process_ocr(receipt: UploadFile) -> dict:
+    content = await receipt.read()
+    # Tesseract is CPU bound, keep it off the event loop
+    text = await ocr_executor.run(_extract_text, content)
+    return {"filename": receipt.filename, "text": text}
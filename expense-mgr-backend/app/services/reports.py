@@ -0,0 +1,298 @@
+import asyncio
+import csv
+import hashlib
+import logging
+import os
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from enum import Enum
+from functools import lru_cache
+from typing import Dict, Optional, Set
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from sqlalchemy import func, select
+from ..config import settings
+from ..crud import expense_report_query, get_expense_data_version
+from ..database import AsyncSessionLocal
+from ..metrics import QUEUE_DEPTH
+from ..models import ExpenseStatus
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+HEADER = (
+    "id", "date", "employee_id", "employee", "category", "description",
+    "amount", "currency", "amount_in_company_currency", "status",
+)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+# Part of every report id; bump it when the file contents change so older cached files aren't reused
+REPORT_LAYOUT_VERSION = "2"
+# Report ids are hex digests; anything else never reaches the filesystem
+REPORT_ID_RE = re.compile(r"[0-9a-f]{32}")
+
+# openpyxl is only needed for XLSX exports, so it is imported on first use
+@lru_cache(maxsize=1)
+def _load_workbook_class():
+    from openpyxl import Workbook
+    return Workbook
+
+def xlsx_available() -> bool:
+    try:
+        _load_workbook_class()
+    except ImportError:
+        return False
+    return True
+
+class _CsvWriter:
+    def __init__(self, path: str):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(HEADER)
+
+    def write(self, rows) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+class _XlsxWriter:
+    # Write-only workbooks stream rows to a temporary file instead of keeping cells in memory
+    def __init__(self, path: str):
+        self._path = path
+        self._book = _load_workbook_class()(write_only=True)
+        self._sheet = self._book.create_sheet("Expenses")
+        self._sheet.append(HEADER)
+
+    def write(self, rows) -> None:
+        for row in rows:
+            self._sheet.append(row)
+
+    def close(self) -> None:
+        self._book.save(self._path)
+
+WRITERS = {"csv": _CsvWriter, "xlsx": _XlsxWriter}
+
+# Spreadsheet programs evaluate text starting with these as a formula (CSV/formula injection)
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+def _cell(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def _cells(row) -> tuple:
+    return tuple(_cell(value) for value in row)
+
+@dataclass
+class ReportJob:
+    id: str
+    company_id: int
+    format: str
+    status: str = QUEUED
+    rows_written: int = 0
+    total_rows: Optional[int] = None
+    # Served from a file generated earlier for the same filters and data
+    cached: bool = False
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+    @property
+    def progress(self) -> float:
+        if self.status == DONE:
+            return 1.0
+        if not self.total_rows:
+            return 0.0
+        return min(self.rows_written / self.total_rows, 1.0)
+
+class ReportManager:
+    """
+    Generates expense exports in the background and keeps the finished files on disk.
+
+    Rows are streamed from a server-side cursor `fetch_size` at a time and written from a
+    worker thread, so memory stays flat however large the company is. A report's id is a
+    hash of (company, format, filters, data version), where the data version fingerprints
+    the company's expenses; asking again before anything changed returns the existing file
+    at once, and any change yields a new id. Files are written under a temporary name and
+    renamed when complete, so a file on disk is always a finished report and every worker
+    sharing `directory` can serve it.
+    """
+
+    def __init__(
+        self,
+        directory: str = settings.REPORTS_DIR,
+        max_concurrent: int = settings.REPORTS_MAX_CONCURRENT,
+        fetch_size: int = settings.REPORTS_FETCH_SIZE,
+        retention: timedelta = timedelta(hours=settings.REPORTS_RETENTION_HOURS),
+        session_factory=AsyncSessionLocal,
+    ):
+        self.directory = directory
+        self.fetch_size = fetch_size
+        self.retention = retention
+        self.session_factory = session_factory
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._jobs: Dict[str, ReportJob] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def active(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status in (QUEUED, RUNNING))
+
+    def path_for(self, job: ReportJob) -> str:
+        return os.path.join(self.directory, str(job.company_id), f"{job.id}.{job.format}")
+
+    async def submit(
+        self,
+        company_id: int,
+        report_format: str = "csv",
+        status: Optional[ExpenseStatus] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> ReportJob:
+        async with self.session_factory() as db:
+            version = await get_expense_data_version(db, company_id)
+        key = "|".join((
+            REPORT_LAYOUT_VERSION, str(company_id), report_format, status.value if status else "",
+            since.isoformat() if since else "", until.isoformat() if until else "", version,
+        ))
+        report_id = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+        job = self._jobs.get(report_id)
+        if job is not None and job.status != FAILED:
+            return job
+        job = ReportJob(id=report_id, company_id=company_id, format=report_format)
+        self._jobs[report_id] = job
+        if os.path.exists(self.path_for(job)):
+            job.status, job.cached, job.finished_at = DONE, True, datetime.utcnow()
+            return job
+
+        task = asyncio.create_task(self._generate(job, expense_report_query(company_id, status, since, until)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, company_id: int, report_id: str) -> Optional[ReportJob]:
+        if not REPORT_ID_RE.fullmatch(report_id):
+            return None
+        job = self._jobs.get(report_id)
+        if job is not None:
+            if job.company_id != company_id:
+                return None
+            if job.status != DONE or os.path.exists(self.path_for(job)):
+                return job
+            del self._jobs[report_id]  # file expired
+            return None
+        # Finished by another worker, or before a restart
+        for report_format in WRITERS:
+            job = ReportJob(id=report_id, company_id=company_id, format=report_format, status=DONE, cached=True)
+            if os.path.exists(self.path_for(job)):
+                return job
+        return None
+
+    async def stop(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _generate(self, job: ReportJob, query) -> None:
+        path = self.path_for(job)
+        partial = f"{path}.{uuid.uuid4().hex}.part"
+        async with self._slots:
+            job.status = RUNNING
+            started = time.perf_counter()
+            self._forget_expired_jobs()
+            try:
+                await asyncio.to_thread(self._prepare_directory, os.path.dirname(path))
+                writer = await asyncio.to_thread(WRITERS[job.format], partial)
+                try:
+                    async with self.session_factory() as db:
+                        job.total_rows = await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+                        result = await db.stream(query.execution_options(yield_per=self.fetch_size))
+                        async for rows in result.partitions():
+                            cells = [_cells(row) for row in rows]
+                            await asyncio.to_thread(writer.write, cells)
+                            job.rows_written += len(cells)
+                finally:
+                    await asyncio.to_thread(writer.close)
+                os.replace(partial, path)
+                job.status = DONE
+                logger.info(f"Report {job.id} ({job.format}, {job.rows_written} rows) took {time.perf_counter() - started:.1f}s")
+            except Exception as e:
+                job.status, job.error = FAILED, str(e)
+                logger.error(f"Report {job.id} failed: {e}")
+            finally:
+                job.finished_at = datetime.utcnow()
+                if job.status != DONE and os.path.exists(partial):
+                    os.remove(partial)
+
+    def _prepare_directory(self, company_directory: str) -> None:
+        """Create the company's report directory and delete its reports older than `retention`."""
+        os.makedirs(company_directory, exist_ok=True)
+        cutoff = time.time() - self.retention.total_seconds()
+        for entry in os.scandir(company_directory):
+            if entry.is_file() and not entry.name.endswith(".part") and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+
+    def _forget_expired_jobs(self) -> None:
+        expired = datetime.utcnow() - self.retention
+        for report_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and job.finished_at < expired:
+                del self._jobs[report_id]
+
+report_manager = ReportManager()
+QUEUE_DEPTH.set_function(report_manager.active, "report_jobs")
+
+# --- Downloads ---
+# Starlette's FileResponse ignores Range, so partial requests are answered here
+RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+async def _file_chunks(path: str, start: int, end: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await asyncio.to_thread(f.read, min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def download_response(manager: ReportManager, job: ReportJob, request: Request) -> Response:
+    """
+    Serve a finished report, honouring a single `Range: bytes=` request (206, or 416 when
+    unsatisfiable) so interrupted downloads can resume. Report ids are content addressed,
+    so the id doubles as a strong ETag for If-Range.
+    """
+    path = manager.path_for(job)
+    size = os.path.getsize(path)
+    media_type = MEDIA_TYPES[job.format]
+    etag = f'"{job.id}"'
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Content-Disposition": f'attachment; filename="expenses-{job.id}.{job.format}"',
+    }
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    match = RANGE_RE.match(range_header.strip()) if range_header else None
+    # Multiple ranges, malformed headers and stale If-Range validators all get the whole file
+    if match and (if_range is None or if_range.strip() == etag) and any(match.groups()):
+        first, last = match.groups()
+        if first:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1
+        if start > end or start >= size:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+        headers.update({"Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(end - start + 1)})
+        return StreamingResponse(_file_chunks(path, start, end), status_code=206, media_type=media_type, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
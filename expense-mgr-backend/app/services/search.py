@@ -0,0 +1,135 @@
+import logging
+import re
+from typing import List, Tuple
+from sqlalchemy import column, func, literal_column, table, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from ..models import Expense
+
+logger = logging.getLogger(__name__)
+
+# Full-text search over expense categories and descriptions.
+# Postgres keeps a weighted tsvector in expenses.search_vector (maintained by a trigger, GIN indexed);
+# SQLite, for local runs, mirrors the two columns into an FTS5 external-content table.
+# Neither lives on the ORM model because the column types are dialect specific: the
+# Alembic migration installs the Postgres objects, create_schema() installs either one.
+
+TS_CONFIG = "english"
+# Only letters and digits reach the query parser, so user input can't produce a syntax error
+TERM_RE = re.compile(r"[^\W_]+")
+MAX_TERMS = 8
+
+# Category matches outrank description matches (ts_rank weights A=1.0, B=0.4)
+_VECTOR_EXPR = (
+    "setweight(to_tsvector('{config}', coalesce({row}category, '')), 'A') || "
+    "setweight(to_tsvector('{config}', coalesce({row}description, '')), 'B')"
+)
+
+POSTGRES_DDL = [
+    "ALTER TABLE expenses ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    f"""CREATE OR REPLACE FUNCTION expenses_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {_VECTOR_EXPR.format(config=TS_CONFIG, row="NEW.")};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS expenses_search_vector_update ON expenses",
+    "CREATE TRIGGER expenses_search_vector_update BEFORE INSERT OR UPDATE OF category, description ON expenses "
+    "FOR EACH ROW EXECUTE FUNCTION expenses_search_vector_update()",
+    # Backfill before building the index, one bulk build is much cheaper than maintaining it row by row
+    f"UPDATE expenses SET search_vector = {_VECTOR_EXPR.format(config=TS_CONFIG, row='')} WHERE search_vector IS NULL",
+    "CREATE INDEX IF NOT EXISTS ix_expenses_search_vector ON expenses USING GIN (search_vector)",
+]
+
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS ix_expenses_search_vector",
+    "DROP TRIGGER IF EXISTS expenses_search_vector_update ON expenses",
+    "DROP FUNCTION IF EXISTS expenses_search_vector_update()",
+    "ALTER TABLE expenses DROP COLUMN IF EXISTS search_vector",
+]
+
+_FTS_INSERT = "INSERT INTO expense_search(rowid, category, description) VALUES (new.id, new.category, new.description);"
+_FTS_DELETE = (
+    "INSERT INTO expense_search(expense_search, rowid, category, description) "
+    "VALUES ('delete', old.id, old.category, old.description);"
+)
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE expense_search USING fts5("
+    "category, description, content='expenses', content_rowid='id', tokenize='porter unicode61')",
+    f"CREATE TRIGGER expenses_search_insert AFTER INSERT ON expenses BEGIN {_FTS_INSERT} END",
+    f"CREATE TRIGGER expenses_search_delete AFTER DELETE ON expenses BEGIN {_FTS_DELETE} END",
+    f"CREATE TRIGGER expenses_search_update AFTER UPDATE OF category, description ON expenses "
+    f"BEGIN {_FTS_DELETE} {_FTS_INSERT} END",
+    "INSERT INTO expense_search(expense_search) VALUES ('rebuild')",
+]
+
+_INSTALLED_CHECKS = {
+    "postgresql": "SELECT 1 FROM information_schema.columns WHERE table_name = 'expenses' AND column_name = 'search_vector'",
+    "sqlite": "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'expense_search'",
+}
+_INSTALL_DDL = {"postgresql": POSTGRES_DDL, "sqlite": SQLITE_DDL}
+
+async def install_search_index(conn: AsyncConnection) -> bool:
+    """Create the search column/table, triggers and index unless they exist. Returns True if it built them."""
+    dialect = conn.dialect.name
+    if dialect not in _INSTALL_DDL:
+        logger.warning(f"Full-text search is not supported on {dialect}")
+        return False
+    if (await conn.execute(text(_INSTALLED_CHECKS[dialect]))).first() is not None:
+        return False
+    for statement in _INSTALL_DDL[dialect]:
+        await conn.exec_driver_sql(statement)
+    logger.info("Built the expense full-text search index")
+    return True
+
+class SearchIndex:
+    """Whether full-text search works on the app's database, settled once at startup by `prepare`."""
+
+    def __init__(self):
+        self.available = False
+
+    async def prepare(self) -> bool:
+        """
+        Check the dialect and the index. A missing SQLite FTS table is built on the spot, it is
+        derived from expenses; on Postgres the index belongs to the Alembic migrations.
+        """
+        from ..database import engine
+
+        async with engine.begin() as conn:
+            dialect = conn.dialect.name
+            if dialect not in _INSTALL_DDL:
+                logger.warning(f"Full-text search is not supported on {dialect}, /expenses/search is disabled")
+                self.available = False
+            elif (await conn.execute(text(_INSTALLED_CHECKS[dialect]))).first() is not None:
+                self.available = True
+            elif dialect == "sqlite":
+                self.available = await install_search_index(conn)
+            else:
+                logger.warning("The expense search index is missing, run `alembic upgrade head`; /expenses/search is disabled")
+                self.available = False
+        return self.available
+
+search_index = SearchIndex()
+
+def match_terms(query: str) -> List[str]:
+    return TERM_RE.findall(query.lower())[:MAX_TERMS]
+
+def apply_match(query, dialect: str, terms: List[str]) -> Tuple[object, object, object]:
+    """
+    Restrict an Expense select to rows matching every term as a prefix.
+    Returns the filtered select, a rank expression where higher is a better match, and the
+    expense id column to order and page on. Only call it once `search_index.available` is set.
+    """
+    if dialect == "postgresql":
+        vector = literal_column("expenses.search_vector")
+        tsquery = func.to_tsquery(literal_column(f"'{TS_CONFIG}'::regconfig"), " & ".join(f"{term}:*" for term in terms))
+        return query.where(vector.op("@@")(tsquery)), func.ts_rank(vector, tsquery), Expense.id
+    if dialect == "sqlite":
+        fts = table("expense_search", column("rowid"))
+        match = literal_column("expense_search").op("MATCH")(" ".join(f'"{term}"*' for term in terms))
+        # bm25() is lower-is-better; the weights mirror the Postgres A/B ranking
+        rank = -func.bm25(literal_column("expense_search"), 1.0, 0.4)
+        # Ordering by the FTS rowid keeps the planner driving the join from the match instead of
+        # walking every company expense by id and probing the FTS table for each one
+        return query.join(fts, fts.c.rowid == Expense.id).where(match), rank, fts.c.rowid
+    raise NotImplementedError(f"Full-text search is not supported on {dialect}")
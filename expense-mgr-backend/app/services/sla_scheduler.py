@@ -0,0 +1,228 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import func, select, update
+from ..auth import send_email
+from ..config import settings
+from ..database import AsyncSessionLocal
+from ..metrics import QUEUE_DEPTH
+from ..models import ApprovalRequest, Expense, ExpenseStatus, User
+from .audit import record_event
+from .events import broker, pending_row
+
+logger = logging.getLogger(__name__)
+
+REMIND, ESCALATE = "remind", "escalate"
+
+# Requests whose expense is still open; an admin override settles the expense but older
+# requests it left undecided must not be chased
+_EXPENSE_PENDING = ApprovalRequest.expense_id.in_(select(Expense.id).where(Expense.status == ExpenseStatus.PENDING))
+
+# Upper bound on a single sleep so clock changes can't stall the loop for long
+MAX_SLEEP_SECONDS = 300
+
+class SlaScheduler:
+    """
+    Fires approval reminders and escalations from an in-memory min-heap of deadlines.
+
+    Pending approvals are loaded once at startup (an index-only read of undecided requests);
+    afterwards the approval workflow calls `schedule` and `cancel` as requests are created and
+    decided, so nothing ever rescans the table. Deadlines are computed from the persisted
+    `created_at`/`escalated_at`/`reminded_at` columns, which keeps restarts correct, and every
+    action is claimed with a conditional UPDATE on the assignment its deadline was computed
+    from, so several workers (or two processes overlapping in a restart) never double-fire.
+    All of those timestamps are naive UTC from `datetime.utcnow()`, never the database clock.
+    """
+
+    def __init__(
+        self,
+        reminder_after: timedelta = timedelta(hours=settings.APPROVAL_REMINDER_HOURS),
+        escalate_after: timedelta = timedelta(hours=settings.APPROVAL_ESCALATION_HOURS),
+        session_factory=AsyncSessionLocal,
+    ):
+        self.reminder_after = reminder_after
+        self.escalate_after = escalate_after
+        self.session_factory = session_factory
+        # (due_at, tiebreak, approval_id, action, assigned_at); stale entries are skipped lazily
+        self._heap: List[Tuple[datetime, int, int, str, datetime]] = []
+        # approval_id -> when the current approver was assigned
+        self._assigned: Dict[int, datetime] = {}
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # Reminder emails in flight; the loop only keeps weak references to tasks
+        self._email_tasks: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._assigned)
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        await self.load()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._email_tasks):
+            task.cancel()
+        await asyncio.gather(*self._email_tasks, return_exceptions=True)
+
+    async def load(self) -> None:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(ApprovalRequest.id, ApprovalRequest.created_at, ApprovalRequest.escalated_at, ApprovalRequest.reminded_at)
+                .where(ApprovalRequest.approved.is_(None))
+            )
+            rows = result.all()
+        for approval_id, created_at, escalated_at, reminded_at in rows:
+            self.schedule(approval_id, escalated_at or created_at, reminded=reminded_at is not None)
+        logger.info(f"SLA scheduler tracking {len(rows)} pending approvals")
+
+    def schedule(self, approval_id: int, assigned_at: datetime, reminded: bool = False) -> None:
+        """Start (or restart, after an escalation) the clocks for an approval."""
+        self._assigned[approval_id] = assigned_at
+        if not reminded:
+            self._push(assigned_at + self.reminder_after, approval_id, REMIND, assigned_at)
+        self._push(assigned_at + self.escalate_after, approval_id, ESCALATE, assigned_at)
+
+    def cancel(self, approval_id: int) -> None:
+        # The heap entries stay behind and are dropped when they surface
+        self._assigned.pop(approval_id, None)
+
+    def _push(self, due_at: datetime, approval_id: int, action: str, assigned_at: datetime) -> None:
+        new_earliest = not self._heap or due_at < self._heap[0][0]
+        heapq.heappush(self._heap, (due_at, next(self._counter), approval_id, action, assigned_at))
+        if new_earliest and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            timeout = MAX_SLEEP_SECONDS
+            if self._heap:
+                timeout = min(timeout, (self._heap[0][0] - datetime.utcnow()).total_seconds())
+            if timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+            now = datetime.utcnow()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, approval_id, action, assigned_at = heapq.heappop(self._heap)
+                if self._assigned.get(approval_id) != assigned_at:
+                    continue
+                try:
+                    if action == REMIND:
+                        await self._remind(approval_id, assigned_at)
+                    else:
+                        await self._escalate(approval_id, assigned_at)
+                except Exception as e:
+                    logger.error(f"SLA {action} failed for approval {approval_id}: {e}")
+
+    async def _remind(self, approval_id: int, assigned_at: datetime) -> None:
+        async with self.session_factory() as db:
+            claimed = await db.execute(
+                update(ApprovalRequest)
+                .where(
+                    ApprovalRequest.id == approval_id,
+                    func.coalesce(ApprovalRequest.escalated_at, ApprovalRequest.created_at) == assigned_at,
+                    ApprovalRequest.approved.is_(None),
+                    ApprovalRequest.reminded_at.is_(None),
+                    _EXPENSE_PENDING,
+                )
+                .values(reminded_at=datetime.utcnow())
+                .returning(ApprovalRequest.approver_id)
+            )
+            approver_id = claimed.scalar()
+            await db.commit()
+            if approver_id is None:
+                return  # decided, escalated, or another worker already reminded
+            approver = await db.get(User, approver_id)
+        await broker.publish(approver_id, "approval.reminder", {"id": approval_id})
+        if approver is not None and approver.email:
+            self._notify_by_email(approver.email, "Approval waiting for you",
+                                  f"Approval request #{approval_id} has been waiting for your decision for over "
+                                  f"{self.reminder_after.total_seconds() / 3600:g} hours.")
+
+    async def _escalate(self, approval_id: int, assigned_at: datetime) -> None:
+        async with self.session_factory() as db:
+            approval = await db.get(ApprovalRequest, approval_id)
+            if approval is None or approval.approved is not None:
+                self.cancel(approval_id)
+                return
+            expense = await db.get(Expense, approval.expense_id)
+            if expense is None or expense.status != ExpenseStatus.PENDING:
+                self.cancel(approval_id)
+                return
+            if (approval.escalated_at or approval.created_at) != assigned_at:
+                # Another worker escalated it already; follow the new approver's clocks instead
+                self._follow(approval)
+                return
+            approver = await db.get(User, approval.approver_id)
+            if approver is None or approver.manager_id is None:
+                # Top of the chain, nobody to hand it to
+                logger.warning(f"Approval {approval_id} is overdue and its approver has no manager")
+                self.cancel(approval_id)
+                return
+            old_approver_id, new_approver_id = approval.approver_id, approver.manager_id
+            now = datetime.utcnow()
+            claimed = await db.execute(
+                update(ApprovalRequest)
+                .where(
+                    ApprovalRequest.id == approval_id,
+                    ApprovalRequest.approver_id == old_approver_id,
+                    # Only the assignment this deadline belongs to, so a stale deadline can't escalate twice
+                    func.coalesce(ApprovalRequest.escalated_at, ApprovalRequest.created_at) == assigned_at,
+                    ApprovalRequest.approved.is_(None),
+                    _EXPENSE_PENDING,
+                )
+                .values(
+                    approver_id=new_approver_id,
+                    escalated_at=now,
+                    escalation_level=func.coalesce(ApprovalRequest.escalation_level, 0) + 1,
+                    reminded_at=None,
+                )
+            )
+            await db.commit()
+            if claimed.rowcount == 0:
+                # Decided or escalated by another worker in the meantime
+                await db.refresh(approval)
+                self._follow(approval)
+                return
+            await db.refresh(approval)
+
+        self.schedule(approval_id, now)
+        # Filed under the approver who missed the deadline; GET /audit scopes events by their user's company
+        record_event("approval_escalated", old_approver_id, approval_id=approval_id, from_user_id=old_approver_id, to_user_id=new_approver_id)
+        await broker.publish(old_approver_id, "approval.escalated", {"id": approval_id, "to": new_approver_id})
+        await broker.publish(new_approver_id, "approval.created", pending_row(approval, expense))
+
+    def _follow(self, approval: ApprovalRequest) -> None:
+        """Track the approval's current assignment, as persisted by whichever worker changed it."""
+        if approval.approved is not None:
+            self.cancel(approval.id)
+        else:
+            self.schedule(approval.id, approval.escalated_at or approval.created_at, reminded=approval.reminded_at is not None)
+
+    def _notify_by_email(self, to_email: str, subject: str, body: str) -> None:
+        async def send():
+            try:
+                await send_email(to_email, subject, body)
+            except Exception as e:
+                logger.error(f"Reminder email to {to_email} failed: {e}")
+        # SMTP runs on the email pool; don't hold up the timer loop
+        task = asyncio.create_task(send())
+        self._email_tasks.add(task)
+        task.add_done_callback(self._email_tasks.discard)
+
+sla_scheduler = SlaScheduler()
+QUEUE_DEPTH.set_function(lambda: len(sla_scheduler), "approval_sla_timers")
@@ -0,0 +1,264 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+import httpx
+from ..config import settings
+from ..metrics import QUEUE_DEPTH, Counter, registry, track_http
+
+logger = logging.getLogger(__name__)
+
+SMS_MESSAGES = registry.register(Counter("sms_messages_total", "SMS messages by outcome", ("outcome",)))
+
+# Longest Retry-After we honour before falling back to our own backoff
+MAX_RETRY_AFTER_SECONDS = 30.0
+
+class SmsError(Exception):
+    pass
+
+class SmsUnavailable(SmsError):
+    """The provider is failing (circuit open) or the send queue is full."""
+
+class SmsThrottled(SmsError):
+    """Too many messages to one number recently."""
+
+def _mask(number: str) -> str:
+    return f"***{number[-4:]}"
+
+class CircuitBreaker:
+    """
+    Stops calling a provider that keeps failing.
+    Closed: calls go through and consecutive failures are counted. After `failure_threshold`
+    of them it opens and every call fails fast for `reset_timeout` seconds. Then it is
+    half-open: one trial call goes through, success closes it again and failure re-opens it.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = settings.SMS_BREAKER_FAILURES,
+        reset_timeout: float = settings.SMS_BREAKER_RESET_SECONDS,
+        clock=time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def is_open(self) -> bool:
+        """True while calls would be refused, without using up the half-open trial."""
+        if self.state == self.OPEN:
+            return self.clock() - self._opened_at < self.reset_timeout
+        return self.state == self.HALF_OPEN and self._trial_in_flight
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if self.clock() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info("SMS provider recovered, circuit closed")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._trial_in_flight = False
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"SMS provider failing, circuit open for {self.reset_timeout}s")
+            self.state = self.OPEN
+            self._opened_at = self.clock()
+
+class NumberThrottle:
+    """At most `limit` messages to the same number in any `window` seconds (sliding log)."""
+
+    # Forget quiet numbers once this many are tracked
+    MAX_TRACKED = 10_000
+
+    def __init__(
+        self,
+        limit: int = settings.SMS_PER_NUMBER_LIMIT,
+        window: float = settings.SMS_PER_NUMBER_WINDOW_SECONDS,
+        clock=time.monotonic,
+    ):
+        self.limit = limit
+        self.window = window
+        self.clock = clock
+        self._sent: Dict[str, Deque[float]] = {}
+
+    def acquire(self, number: str) -> bool:
+        now = self.clock()
+        sent = self._sent.setdefault(number, deque())
+        while sent and sent[0] <= now - self.window:
+            sent.popleft()
+        if len(sent) >= self.limit:
+            return False
+        sent.append(now)
+        if len(self._sent) > self.MAX_TRACKED:
+            self._prune(now)
+        return True
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.window
+        for number in [number for number, sent in self._sent.items() if not sent or sent[-1] <= cutoff]:
+            del self._sent[number]
+
+@dataclass
+class SmsMessage:
+    to: str
+    body: str
+
+class SmsDispatcher:
+    """
+    Sends SMS through the provider's HTTP API from a bounded queue drained by a few workers
+    sharing one pooled AsyncClient, so request handlers never wait on the provider.
+
+    `send` only enqueues. It fails fast instead: SmsThrottled when the number hit its limit,
+    SmsUnavailable when the queue is full or the circuit breaker has opened after repeated
+    provider failures. Workers retry 5xx, 429 and transport errors with jittered exponential
+    backoff (honouring Retry-After); other 4xx responses are final.
+    """
+
+    def __init__(
+        self,
+        api_url: str = settings.SMS_API_URL,
+        api_key: str = settings.SMS_API_KEY,
+        sender_id: str = settings.SMS_SENDER_ID,
+        queue_size: int = settings.SMS_QUEUE_SIZE,
+        workers: int = settings.SMS_WORKERS,
+        max_attempts: int = settings.SMS_MAX_ATTEMPTS,
+        backoff: float = settings.SMS_BACKOFF_SECONDS,
+        timeout: float = settings.SMS_TIMEOUT_SECONDS,
+        max_connections: int = settings.SMS_MAX_CONNECTIONS,
+        breaker: Optional[CircuitBreaker] = None,
+        throttle: Optional[NumberThrottle] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.sender_id = sender_id
+        self.queue_size = queue_size
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.breaker = breaker or CircuitBreaker()
+        self.throttle = throttle or NumberThrottle()
+        # Tests pass httpx.ASGITransport(app=SmsStub().app) to skip the network
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def __len__(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            transport=self.transport,
+        )
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self, drain_timeout: float = 5.0) -> None:
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self._queue.qsize()} unsent SMS at shutdown")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._client.aclose()
+        self._queue = None
+
+    def send(self, to: str, body: str) -> None:
+        """Queue a message, raising SmsThrottled or SmsUnavailable when it can't be accepted."""
+        if self._queue is None:
+            raise SmsUnavailable("SMS is not running")
+        if self.breaker.is_open():
+            SMS_MESSAGES.inc("circuit_open")
+            raise SmsUnavailable("SMS provider is unavailable")
+        if self._queue.full():
+            SMS_MESSAGES.inc("queue_full")
+            raise SmsUnavailable("Too many SMS waiting to be sent")
+        if not self.throttle.acquire(to):
+            SMS_MESSAGES.inc("throttled")
+            raise SmsThrottled("Too many messages sent to this number, try again later")
+        self._queue.put_nowait(SmsMessage(to=to, body=body))
+
+    async def _work(self) -> None:
+        while True:
+            message = await self._queue.get()
+            try:
+                await self._deliver(message)
+            except Exception as e:
+                logger.error(f"SMS to {_mask(message.to)} failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, message: SmsMessage) -> None:
+        reason = ""
+        for attempt in range(1, self.max_attempts + 1):
+            if not self.breaker.allow():
+                SMS_MESSAGES.inc("circuit_open")
+                logger.warning(f"SMS to {_mask(message.to)} dropped, provider circuit is open")
+                return
+            retry_after = None
+            try:
+                with track_http("sms"):
+                    response = await self._client.post(
+                        self.api_url, json={"to": message.to, "from": self.sender_id, "message": message.body}
+                    )
+            except httpx.HTTPError as e:
+                self.breaker.record_failure()
+                reason = str(e) or type(e).__name__
+            else:
+                if response.is_success:
+                    self.breaker.record_success()
+                    SMS_MESSAGES.inc("sent")
+                    return
+                if response.status_code != 429 and response.status_code < 500:
+                    # The provider is fine but refused this message (bad number, bad payload)
+                    self.breaker.record_success()
+                    SMS_MESSAGES.inc("rejected")
+                    logger.error(f"SMS to {_mask(message.to)} rejected with HTTP {response.status_code}")
+                    return
+                self.breaker.record_failure()
+                reason = f"HTTP {response.status_code}"
+                retry_after = _retry_after(response)
+            if attempt < self.max_attempts:
+                delay = retry_after if retry_after is not None else random.uniform(0, self.backoff * 2 ** (attempt - 1))
+                await asyncio.sleep(delay)
+        SMS_MESSAGES.inc("failed")
+        logger.error(f"SMS to {_mask(message.to)} failed after {self.max_attempts} attempts: {reason}")
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return min(float(response.headers["retry-after"]), MAX_RETRY_AFTER_SECONDS)
+    except (KeyError, ValueError):
+        return None
+
+sms_dispatcher = SmsDispatcher()
+QUEUE_DEPTH.set_function(lambda: len(sms_dispatcher), "sms")
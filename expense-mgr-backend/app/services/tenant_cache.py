@@ -0,0 +1,141 @@
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
+from ..metrics import Counter, Gauge, registry
+from ..models import ApprovalRule, Company
+from .events import broker
+
+logger = logging.getLogger(__name__)
+
+TENANT_CACHE_LOOKUPS = registry.register(Counter("tenant_cache_lookups_total", "Tenant context lookups by result", ("result",)))
+TENANT_CACHE_EVICTIONS = registry.register(Counter("tenant_cache_evictions_total", "Tenant contexts dropped by reason", ("reason",)))
+TENANT_CACHE_ENTRIES = registry.register(Gauge("tenant_cache_entries", "Tenant contexts currently cached"))
+TENANT_CACHE_HIT_RATIO = registry.register(Gauge("tenant_cache_hit_ratio", "Share of tenant context lookups served from memory"))
+
+# Broadcast to every worker when a company's settings or rules change
+TENANT_INVALIDATED = "tenant.invalidated"
+
+@dataclass(frozen=True)
+class CompiledRule:
+    id: int
+    name: str
+    is_sequential: bool
+    rules: Mapping
+
+@dataclass(frozen=True)
+class TenantContext:
+    """Everything company-scoped a request usually needs, read together and shared read-only."""
+    company_id: int
+    name: str
+    currency: Optional[str]
+    version: int
+    rules: Tuple[CompiledRule, ...]
+
+@dataclass
+class _Entry:
+    context: TenantContext
+    expires_at: float
+
+class TenantCache:
+    """
+    LRU cache of TenantContext by company id, bounded to `capacity` companies.
+
+    Writes through crud bump companies.settings_version in the same transaction and then call
+    `invalidate`, which drops the local entry and broadcasts the new version so the other
+    workers drop theirs. An entry at or above a broadcast version is already fresh and kept,
+    which makes late or repeated messages harmless. `ttl` bounds how stale an entry can get
+    if a broadcast is lost.
+    """
+
+    def __init__(
+        self,
+        capacity: int = settings.TENANT_CACHE_SIZE,
+        ttl: float = settings.TENANT_CACHE_TTL_SECONDS,
+        clock=time.monotonic,
+    ):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        # Bumped by every invalidation; a load that overlapped one isn't cached
+        self._epoch = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, db: AsyncSession, company_id: int) -> Optional[TenantContext]:
+        entry = self._entries.get(company_id)
+        if entry is not None:
+            if entry.expires_at > self.clock():
+                self._entries.move_to_end(company_id)
+                TENANT_CACHE_LOOKUPS.inc("hit")
+                return entry.context
+            del self._entries[company_id]
+            TENANT_CACHE_EVICTIONS.inc("expired")
+        TENANT_CACHE_LOOKUPS.inc("miss")
+
+        epoch = self._epoch
+        context = await self._load(db, company_id)
+        if context is not None and epoch == self._epoch:
+            self._entries[company_id] = _Entry(context, self.clock() + self.ttl)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                TENANT_CACHE_EVICTIONS.inc("capacity")
+        return context
+
+    async def invalidate(self, company_id: int, version: int) -> None:
+        self.invalidate_local(company_id, version)
+        await broker.broadcast(TENANT_INVALIDATED, {"company_id": company_id, "version": version})
+
+    def invalidate_local(self, company_id: int, version: int) -> None:
+        entry = self._entries.get(company_id)
+        if entry is not None and entry.context.version >= version:
+            return
+        self._epoch += 1
+        if self._entries.pop(company_id, None) is not None:
+            TENANT_CACHE_EVICTIONS.inc("invalidated")
+
+    def clear(self) -> None:
+        self._epoch += 1
+        self._entries.clear()
+
+    async def _load(self, db: AsyncSession, company_id: int) -> Optional[TenantContext]:
+        result = await db.execute(
+            select(Company.name, Company.currency, Company.settings_version).where(Company.id == company_id)
+        )
+        company = result.first()
+        if company is None:
+            return None
+        result = await db.execute(
+            select(ApprovalRule.id, ApprovalRule.name, ApprovalRule.is_sequential, ApprovalRule.rules)
+            .where(ApprovalRule.company_id == company_id)
+            .order_by(ApprovalRule.id)
+        )
+        rules = tuple(
+            CompiledRule(id=rule.id, name=rule.name, is_sequential=rule.is_sequential, rules=MappingProxyType(dict(rule.rules or {})))
+            for rule in result.all()
+        )
+        return TenantContext(
+            company_id=company_id,
+            name=company.name,
+            currency=company.currency,
+            version=company.settings_version or 0,
+            rules=rules,
+        )
+
+tenant_cache = TenantCache()
+TENANT_CACHE_ENTRIES.set_function(lambda: len(tenant_cache))
+
+def _hit_ratio() -> float:
+    hits = TENANT_CACHE_LOOKUPS.values.get(("hit",), 0.0)
+    total = hits + TENANT_CACHE_LOOKUPS.values.get(("miss",), 0.0)
+    return hits / total if total else 0.0
+
+TENANT_CACHE_HIT_RATIO.set_function(_hit_ratio)
+broker.listen(TENANT_INVALIDATED, lambda data: tenant_cache.invalidate_local(data["company_id"], data["version"]))
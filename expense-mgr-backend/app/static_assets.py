@@ -0,0 +1,159 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+try:  # brotli is optional, gzip is always available
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Files smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+# Formats that are already compressed
+INCOMPRESSIBLE_TYPES = ("image/png", "image/jpeg", "image/gif", "image/webp", "font/woff", "font/woff2", "application/zip")
+
+# Bundler output like main.3f9a1c2b.chunk.js or index-Bk3X9aZq.css is safe to cache forever.
+# The hash must contain a digit, so plain names like asset-manifest.json or my-component.js don't qualify
+HASHED_NAME_RE = re.compile(r"[.-](?=[A-Za-z_]*[0-9])[0-9A-Za-z_]{8,32}(\.[a-z0-9]+)+$")
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+
+@dataclass
+class Asset:
+    """A static file held in memory together with its precompressed variants."""
+    media_type: str
+    cache_control: str
+    bodies: Dict[str, bytes] = field(default_factory=dict)
+    # Strong validators, one per encoding since each is different bytes
+    etags: Dict[str, str] = field(default_factory=dict)
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+
+def _matching_etag(if_none_match: str, etags: Iterable[str], preferred: str) -> Optional[str]:
+    """The tag a 304 should carry: `preferred` if the client has it, else any other variant it has."""
+    if if_none_match.strip() == "*":
+        return preferred
+    # Compare weakly so that proxies that add W/ still get a 304
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    if preferred in tags:
+        return preferred
+    return next((etag for etag in etags if etag in tags), None)
+
+
+class StaticAssets:
+    """
+    Serves the built frontend from memory.
+    The directory is scanned once with `load()`; every asset is compressed up front
+    so requests only negotiate an encoding and copy bytes.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.assets: Dict[str, Asset] = {}
+
+    def load(self) -> None:
+        assets = {}
+        if not os.path.isdir(self.directory):
+            logger.warning(f"Static directory {self.directory} not found, frontend will not be served")
+            self.assets = assets
+            return
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                full_path = os.path.join(root, name)
+                rel_path = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    assets[rel_path] = self._build_asset(rel_path, f.read())
+        self.assets = assets
+        logger.info(f"Loaded {len(assets)} static assets from {self.directory}")
+
+    def _build_asset(self, rel_path: str, content: bytes) -> Asset:
+        media_type = mimetypes.guess_type(rel_path)[0] or "application/octet-stream"
+        digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+        hashed = HASHED_NAME_RE.search(os.path.basename(rel_path)) is not None
+        asset = Asset(
+            media_type=media_type,
+            cache_control=IMMUTABLE_CACHE if hashed else REVALIDATE_CACHE,
+            bodies={"identity": content},
+        )
+        if len(content) >= MIN_COMPRESS_SIZE and media_type not in INCOMPRESSIBLE_TYPES:
+            gz = gzip.compress(content, compresslevel=9, mtime=0)
+            if len(gz) < len(content):
+                asset.bodies["gzip"] = gz
+            if brotli is not None:
+                br = brotli.compress(content, quality=11)
+                if len(br) < len(content):
+                    asset.bodies["br"] = br
+        asset.etags = {
+            encoding: f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+            for encoding in asset.bodies
+        }
+        return asset
+
+    def get(self, path: str) -> Optional[Asset]:
+        return self.assets.get(path.lstrip("/"))
+
+    def serve(self, asset: Asset, request: Request) -> Response:
+        encoding = "identity"
+        if len(asset.bodies) > 1:
+            accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+            for candidate in ("br", "gzip"):
+                if candidate in asset.bodies and accepted.get(candidate, 0) > 0:
+                    encoding = candidate
+                    break
+        headers = {
+            "ETag": asset.etags[encoding],
+            "Cache-Control": asset.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        # Any variant the client holds is still current, whichever encoding it came in
+        if_none_match = request.headers.get("if-none-match")
+        matched = if_none_match and _matching_etag(if_none_match, asset.etags.values(), headers["ETag"])
+        if matched:
+            headers["ETag"] = matched
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        body = asset.bodies[encoding]
+        if request.method == "HEAD":
+            headers["Content-Length"] = str(len(body))
+            body = b""
+        return Response(content=body, media_type=asset.media_type, headers=headers)
+
+    def serve_path(self, path: str, request: Request) -> Response:
+        asset = self.get(path)
+        if asset is None:
+            return JSONResponse({"error": "Not found"}, status_code=404)
+        return self.serve(asset, request)
+
+    def serve_index(self, request: Request) -> Response:
+        return self.serve_path("index.html", request)
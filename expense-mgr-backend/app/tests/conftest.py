@@ -0,0 +1,32 @@
+import os
+
+# Tests run against in-memory SQLite and stub services, never the .env configuration
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite://"
+for key, value in {
+    "SECRET_KEY": "test-secret",
+    "SMTP_HOST": "localhost",
+    "SMTP_PORT": "587",
+    "SMTP_USER": "test@example.com",
+    "SMTP_PASSWORD": "unused",
+    "SMS_API_URL": "http://sms.test/sms",
+    "SMS_API_KEY": "unused",
+    "SMS_SENDER_ID": "TEST",
+}.items():
+    os.environ.setdefault(key, value)
+
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    """Session factory bound to a fresh in-memory database with every table created."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+    await engine.dispose()
@@ -0,0 +1,82 @@
+"""
+Local stand-in for the SMS provider API, for tests and local runs.
+
+In-process, skip the socket entirely:
+
+    stub = SmsStub()
+    dispatcher = SmsDispatcher(api_url="http://sms.test/sms", transport=httpx.ASGITransport(app=stub.app))
+
+Or serve it and point the app at it:
+
+    python -m app.tests.sms_stub --port 8025
+    SMS_API_URL=http://127.0.0.1:8025/sms uvicorn app.main:app
+
+Accepted messages are kept in `messages` (GET /_messages). Failures and latency are scripted
+with `fail_next(count, status, retry_after)` and `delay`, or over HTTP with POST /_control
+{"fail": 3, "status": 503, "retry_after": 1, "delay": 0.5}.
+"""
+import argparse
+import asyncio
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+class SmsStub:
+    def __init__(self):
+        self.messages: List[dict] = []
+        self.delay = 0.0
+        self.requests = 0
+        # (status, Retry-After seconds or None)
+        self._failures: Deque[Tuple[int, Optional[float]]] = deque()
+        self.app = FastAPI(title="SMS provider stub")
+        self.app.post("/sms")(self.receive)
+        self.app.post("/_control")(self.control)
+        self.app.get("/_messages")(self.list_messages)
+
+    def fail_next(self, count: int = 1, status: int = 503, retry_after: Optional[float] = None) -> None:
+        """Answer the next `count` messages with `status`; 429s say Retry-After: 0 unless told otherwise."""
+        if retry_after is None and status == 429:
+            retry_after = 0
+        self._failures.extend([(status, retry_after)] * count)
+
+    async def receive(self, request: Request):
+        self.requests += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self._failures:
+            status, retry_after = self._failures.popleft()
+            headers = {"Retry-After": f"{retry_after:g}"} if retry_after is not None else None
+            return JSONResponse({"error": "stubbed failure"}, status_code=status, headers=headers)
+        payload = await request.json()
+        if not payload.get("to") or not payload.get("message"):
+            return JSONResponse({"error": "to and message are required"}, status_code=400)
+        self.messages.append(payload)
+        return {"id": len(self.messages), "status": "queued"}
+
+    async def control(self, request: Request):
+        settings = await request.json()
+        if "delay" in settings:
+            self.delay = float(settings["delay"])
+        if settings.get("fail"):
+            retry_after = settings.get("retry_after")
+            self.fail_next(int(settings["fail"]), int(settings.get("status", 503)), None if retry_after is None else float(retry_after))
+        if settings.get("reset"):
+            self.messages.clear()
+            self._failures.clear()
+        return {"delay": self.delay, "pending_failures": len(self._failures)}
+
+    async def list_messages(self):
+        return self.messages
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the SMS provider stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args(argv)
+    uvicorn.run(SmsStub().app, host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from httpx import ASGITransport, AsyncClient
+
+from app.auth import create_access_token, get_current_user, get_stream_user
+from app.database import get_db
+from app.deps import is_admin, is_manager_or_admin
+from app.main import app
+from app.models import ApprovalRequest, Company, Expense, ExpenseStatus, Role, User
+from app.services.approval_workflow import start_approval
+from app.services.events import broker
+from app.services.sla_scheduler import sla_scheduler
+
+
+@pytest_asyncio.fixture
+async def inbox(session_factory):
+    """A pending approval for the manager, the manager's client and their event subscription."""
+    async with session_factory() as db:
+        company = Company(name="Acme", currency="USD")
+        db.add(company)
+        await db.flush()
+        manager = User(username="manager", email="m@example.com", hashed_password="x", role=Role.MANAGER, company_id=company.id)
+        db.add(manager)
+        await db.flush()
+        employee = User(username="employee", email="e@example.com", hashed_password="x", company_id=company.id, manager_id=manager.id)
+        db.add(employee)
+        await db.flush()
+        expense = Expense(employee_id=employee.id, company_id=company.id, amount=10, currency="USD", amount_in_company_currency=10)
+        db.add(expense)
+        await db.commit()
+        await broker.start()
+        approval = await start_approval(db, expense, employee)
+
+    async def override_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[is_manager_or_admin] = lambda: manager
+    try:
+        with broker.subscribe(manager.id) as sub:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                yield client, approval.id, sub
+    finally:
+        app.dependency_overrides.clear()
+        sla_scheduler.cancel(approval.id)
+
+
+def published(sub) -> list:
+    events = []
+    while not sub.queue.empty():
+        event = sub.queue.get_nowait()
+        events.append((event.type, event.data))
+    return events
+
+
+@pytest.mark.asyncio
+async def test_comment_keeps_request_pending(inbox):
+    client, approval_id, sub = inbox
+    response = await client.patch(f"/approvals/{approval_id}", json={"comments": "looking"})
+    assert response.status_code == 200
+    assert response.json()["approved"] is None
+    assert published(sub) == []
+    pending = await client.get("/approvals/pending")
+    assert [row["id"] for row in pending.json()] == [approval_id]
+    # Reminders and escalation still apply
+    assert approval_id in sla_scheduler._assigned
+
+
+@pytest.mark.asyncio
+async def test_decision_is_published_once(inbox):
+    client, approval_id, sub = inbox
+    response = await client.patch(f"/approvals/{approval_id}", json={"approved": True})
+    assert response.status_code == 200
+    assert published(sub) == [("approval.decided", {"id": approval_id, "approved": True})]
+    assert approval_id not in sla_scheduler._assigned
+
+    again = await client.patch(f"/approvals/{approval_id}", json={"approved": False})
+    assert again.status_code == 409
+    assert published(sub) == []
+
+
+@pytest.mark.asyncio
+async def test_stream_token_authenticates_only_the_stream(inbox, session_factory):
+    client, _, _ = inbox
+    response = await client.post("/approvals/stream-token")
+    assert response.status_code == 200
+    token = response.json()["token"]
+
+    async with session_factory() as db:
+        user = await get_stream_user(token=token, bearer=None, db=db)
+        assert user.username == "manager"
+        # It is not an access token
+        with pytest.raises(HTTPException) as error:
+            await get_current_user(token=token, db=db)
+        assert error.value.status_code == 401
+        # And access tokens don't go in URLs
+        with pytest.raises(HTTPException):
+            await get_stream_user(token=create_access_token({"sub": "manager"}), bearer=None, db=db)
+        with pytest.raises(HTTPException):
+            await get_stream_user(token=None, bearer=None, db=db)
+
+
+@pytest.mark.asyncio
+async def test_admin_override_closes_open_requests(inbox, session_factory):
+    client, approval_id, sub = inbox
+    async with session_factory() as db:
+        admin = User(username="admin", email="a@example.com", hashed_password="x", role=Role.ADMIN, company_id=1)
+        db.add(admin)
+        await db.commit()
+        expense_id = (await db.get(ApprovalRequest, approval_id)).expense_id
+    app.dependency_overrides[is_admin] = lambda: admin
+
+    response = await client.patch(f"/admin/expenses/{expense_id}", params={"status": "REJECTED"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "REJECTED"
+    async with session_factory() as db:
+        approval = await db.get(ApprovalRequest, approval_id)
+        assert (await db.get(Expense, expense_id)).status == ExpenseStatus.REJECTED
+    assert approval.approved is False
+    assert approval.comments == "Settled by an administrator"
+    # Gone from the inbox and from the SLA scheduler
+    assert published(sub) == [("approval.decided", {"id": approval_id, "approved": False})]
+    assert approval_id not in sla_scheduler._assigned
+    assert (await client.get("/approvals/pending")).json() == []
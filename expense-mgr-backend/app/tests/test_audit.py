@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+from app.models import AuditLog
+from app.services.audit import AuditWriter
+
+
+async def count_rows(session_factory) -> int:
+    async with session_factory() as db:
+        return await db.scalar(select(func.count()).select_from(AuditLog))
+
+
+@pytest.mark.asyncio
+async def test_bad_event_is_isolated_after_max_attempts(session_factory):
+    writer = AuditWriter(batch_size=10, max_attempts=2, session_factory=session_factory)
+    writer.record("ok.before")
+    # Not JSON serializable, so every INSERT containing it fails
+    writer.record("poison", details={"value": object()})
+    writer.record("ok.after")
+
+    for _ in range(2):
+        with pytest.raises(Exception):
+            await writer.flush()
+    assert len(writer) == 3
+
+    assert await writer.flush() == 2
+    assert writer.rejected == 1
+    assert len(writer) == 0
+    assert await count_rows(session_factory) == 2
+
+    # The writer is unblocked for later events
+    writer.record("ok.later")
+    assert await writer.flush() == 1
+
+
+class UnavailableSession:
+    async def __aenter__(self):
+        raise OperationalError("INSERT", {}, ConnectionRefusedError("database is down"))
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.mark.asyncio
+async def test_events_are_kept_while_database_is_unreachable():
+    writer = AuditWriter(batch_size=10, max_attempts=1, session_factory=UnavailableSession)
+    writer.record("a")
+    writer.record("b")
+    for _ in range(3):
+        with pytest.raises(OperationalError):
+            await writer.flush()
+    assert len(writer) == 2
+    assert writer.rejected == 0
+
+
+@pytest.mark.asyncio
+async def test_requeue_into_a_full_buffer_drops_the_oldest():
+    writer = AuditWriter(capacity=3, batch_size=2, session_factory=UnavailableSession)
+    for action in ("a", "b", "c"):
+        writer.record(action)
+    batch = [writer._buffer.popleft() for _ in range(2)]
+    # A new event arrives while the batch is being written
+    writer.record("d")
+    writer._requeue(batch)
+    assert [event["action"] for event in writer._buffer] == ["b", "c", "d"]
+    assert writer.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_stop_survives_an_unreachable_database(caplog):
+    writer = AuditWriter(flush_interval=60, session_factory=UnavailableSession)
+    await writer.start()
+    writer.record("a")
+    writer.record("b")
+    await writer.stop()
+    assert "2 events lost" in caplog.text
@@ -0,0 +1,96 @@
+import pytest
+import pytest_asyncio
+
+from app.services.events import RESYNC, ApprovalBroker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest_asyncio.fixture
+async def broker():
+    broker = ApprovalBroker(buffer_size=3, replay_size=5, replay_ttl=100.0, clock=FakeClock())
+    await broker.start()
+    return broker
+
+
+def drain(sub) -> list:
+    events = []
+    while not sub.queue.empty():
+        events.append(sub.queue.get_nowait())
+    return events
+
+
+@pytest.mark.asyncio
+async def test_events_reach_only_their_user(broker):
+    with broker.subscribe(1) as mine, broker.subscribe(2) as other:
+        await broker.publish(1, "approval.created", {"id": 10})
+        assert [(e.type, e.data) for e in drain(mine)] == [("approval.created", {"id": 10})]
+        assert drain(other) == []
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_gets_one_resync_instead_of_the_backlog(broker):
+    with broker.subscribe(1) as sub:
+        for i in range(5):
+            await broker.publish(1, "approval.created", {"id": i})
+        resync = await sub.get()
+        assert (resync.type, resync.data) == (RESYNC, {"reason": "overflow"})
+        assert sub.queue.empty()
+        # Having read the resync, the subscriber receives events again
+        await broker.publish(1, "approval.created", {"id": 5})
+        assert [e.data["id"] for e in drain(sub)] == [5]
+
+
+@pytest.mark.asyncio
+async def test_reconnect_replays_events_after_last_event_id(broker):
+    for i in range(3):
+        await broker.publish(1, "approval.created", {"id": i})
+    first_id = broker._channels[1].recent[0].id
+    with broker.subscribe(1, last_event_id=first_id) as sub:
+        assert [e.data["id"] for e in drain(sub)] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_resume_point_evicted_from_replay_buffer_resyncs(broker):
+    await broker.publish(1, "approval.created", {"id": 0})
+    evicted_id = broker._channels[1].recent[0].id
+    for i in range(1, 6):
+        await broker.publish(1, "approval.created", {"id": i})
+    with broker.subscribe(1, last_event_id=evicted_id) as sub:
+        events = drain(sub)
+        assert [(e.type, e.data) for e in events] == [(RESYNC, {"reason": "expired"})]
+        assert events[0].id == broker._channels[1].recent[-1].id
+
+
+@pytest.mark.asyncio
+async def test_resume_point_from_a_previous_process_resyncs(broker):
+    await broker.publish(1, "approval.created", {"id": 1})
+    old_id = broker._channels[1].recent[-1].id
+
+    restarted = ApprovalBroker(buffer_size=3, replay_size=5, replay_ttl=100.0, clock=FakeClock())
+    await restarted.start()
+    for i in range(1, 4):
+        await restarted.publish(1, "approval.created", {"id": i})
+    # The new process counts from 1 again, but its ids can't collide with the old ones
+    assert old_id not in [e.id for e in restarted._channels[1].recent]
+    with restarted.subscribe(1, last_event_id=old_id) as sub:
+        assert [(e.type, e.data) for e in drain(sub)] == [(RESYNC, {"reason": "expired"})]
+
+
+@pytest.mark.asyncio
+async def test_idle_channels_are_forgotten(broker):
+    clock = broker.clock
+    await broker.publish(1, "approval.created", {"id": 1})
+    with broker.subscribe(2):
+        clock.now = 150.0
+        await broker.publish(3, "approval.created", {"id": 3})
+        # User 1 has nobody listening and only stale events; user 2 is subscribed
+        assert set(broker._channels) == {2, 3}
+    # A subscriber that leaves a channel without events doesn't leave it behind
+    assert set(broker._channels) == {3}
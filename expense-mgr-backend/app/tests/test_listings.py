@@ -0,0 +1,136 @@
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+
+from app.auth import get_current_user
+from app.database import get_db
+from app.deps import is_admin, is_manager_or_admin
+from app.main import app
+from app.models import ApprovalRequest, Company, Expense, ExpenseStatus, Role, User
+from app.schemas import ExpenseList, ExpenseRow, PendingApprovalList, PendingApprovalRow, UserList, UserRow
+
+STATUSES = [ExpenseStatus.PENDING, ExpenseStatus.APPROVED, ExpenseStatus.REJECTED]
+
+
+@pytest_asyncio.fixture
+async def client(session_factory):
+    """An admin who is also the manager of an employee with five expenses waiting on them."""
+    async with session_factory() as db:
+        db.add(Company(name="Other", currency="EUR"))
+        company = Company(name="Acme", currency="USD")
+        db.add(company)
+        await db.flush()
+        admin = User(username="admin", email="a@example.com", hashed_password="x", role=Role.ADMIN, company_id=company.id)
+        db.add(admin)
+        await db.flush()
+        employee = User(username="employee", email="e@example.com", hashed_password="x", company_id=company.id, manager_id=admin.id)
+        db.add(employee)
+        # Another company's user and expense, which no listing should return
+        outsider = User(username="outsider", email="o@example.com", hashed_password="x", company_id=1)
+        db.add(outsider)
+        await db.flush()
+        db.add(Expense(employee_id=outsider.id, company_id=1, amount=1, currency="EUR", amount_in_company_currency=1))
+        for i in range(5):
+            expense = Expense(
+                employee_id=employee.id, company_id=company.id, amount=10.5 + i, currency="EUR",
+                amount_in_company_currency=11.25 + i, category="Travel" if i % 2 else None,
+                description=f"Trip {i}", date=datetime(2024, 1, 2 + i, 3, 4, 5, 250000 * (i % 2)),
+                status=STATUSES[i % 3],
+            )
+            db.add(expense)
+            await db.flush()
+            db.add(ApprovalRequest(expense_id=expense.id, approver_id=admin.id, created_at=datetime(2024, 2, 1 + i, 8, 30)))
+        await db.commit()
+
+    async def override_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: employee
+    app.dependency_overrides[is_manager_or_admin] = lambda: admin
+    app.dependency_overrides[is_admin] = lambda: admin
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+
+
+async def page_through(client, url: str, limit: int = 2, **filters) -> list:
+    """Follow `before_id` until a short page, checking every page is newest first."""
+    rows, before_id = [], None
+    while True:
+        params = {**filters, "limit": limit}
+        if before_id is not None:
+            params["before_id"] = before_id
+        response = await client.get(url, params=params)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        page = response.json()
+        assert len(page) <= limit
+        ids = [row["id"] for row in page]
+        assert ids == sorted(ids, reverse=True)
+        if before_id is not None:
+            assert all(row_id < before_id for row_id in ids)
+        rows.extend(page)
+        if len(page) < limit:
+            return rows
+        before_id = ids[-1]
+
+
+def assert_matches_schema(adapter, row_type, rows: list) -> None:
+    # What the declared response_model would have produced
+    assert adapter.dump_python(adapter.validate_python(rows), mode="json") == rows
+    for row in rows:
+        assert set(row) == set(row_type.__annotations__)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("url", ["/expenses/", "/admin/expenses"])
+async def test_expense_listings(client, url):
+    rows = await page_through(client, url)
+    assert [row["id"] for row in rows] == [6, 5, 4, 3, 2]
+    assert_matches_schema(ExpenseList, ExpenseRow, rows)
+    assert rows[-1] == {
+        "id": 2, "employee_id": 2, "amount": 10.5, "currency": "EUR", "amount_in_company_currency": 11.25,
+        "category": None, "description": "Trip 0", "date": "2024-01-02T03:04:05", "status": "PENDING",
+    }
+    assert rows[-2]["date"] == "2024-01-03T03:04:05.250000"
+    assert [row["status"] for row in rows] == ["APPROVED", "PENDING", "REJECTED", "APPROVED", "PENDING"]
+
+
+@pytest.mark.asyncio
+async def test_admin_expense_listing_filters_by_status(client):
+    rows = await page_through(client, "/admin/expenses", limit=1, status="APPROVED")
+    assert [(row["id"], row["status"]) for row in rows] == [(6, "APPROVED"), (3, "APPROVED")]
+
+
+@pytest.mark.asyncio
+async def test_pending_approvals_listing(client):
+    rows = await page_through(client, "/approvals/pending")
+    assert [row["id"] for row in rows] == [5, 4, 3, 2, 1]
+    assert_matches_schema(PendingApprovalList, PendingApprovalRow, rows)
+    assert rows[-1] == {
+        "id": 1, "expense_id": 2, "step": 1, "created_at": "2024-02-01T08:30:00", "employee_id": 2,
+        "amount": 10.5, "currency": "EUR", "category": None, "description": "Trip 0",
+    }
+
+
+@pytest.mark.asyncio
+async def test_users_listing(client):
+    rows = await page_through(client, "/users/", limit=1)
+    assert rows == [
+        {"id": 2, "username": "employee", "email": "e@example.com", "role": "EMPLOYEE", "manager_id": 1},
+        {"id": 1, "username": "admin", "email": "a@example.com", "role": "ADMIN", "manager_id": None},
+    ]
+    assert_matches_schema(UserList, UserRow, rows)
+
+
+@pytest.mark.asyncio
+async def test_empty_page(client):
+    response = await client.get("/expenses/", params={"before_id": 2})
+    assert response.status_code == 200
+    assert response.json() == []
@@ -0,0 +1,99 @@
+import re
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+
+from app.database import get_db
+from app.deps import is_admin
+from app.main import app
+from app.metrics import REQUEST_DB_STATEMENTS, instrument_engine
+from app.models import Company, Role, User
+
+SAMPLE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[a-zA-Z_][a-zA-Z0-9_]*="[^"\n]*"(,[a-zA-Z_][a-zA-Z0-9_]*="[^"\n]*")*\})? (\S+)$')
+
+
+def parse_exposition(text: str) -> dict:
+    """Check `text` is valid Prometheus exposition and return {"name{labels}": value}."""
+    assert text.endswith("\n")
+    declared = {}
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            continue
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            assert kind in ("counter", "gauge", "histogram")
+            declared[name] = kind
+            continue
+        match = SAMPLE_RE.match(line)
+        assert match, f"not a valid sample line: {line!r}"
+        name, labels, value = match.group(1), match.group(2) or "", match.group(4)
+        family = re.sub(r"_(bucket|sum|count)$", "", name) if name not in declared else name
+        assert family in declared, f"{name} has no TYPE line"
+        samples[name + labels] = float(value)
+    return samples
+
+
+@pytest_asyncio.fixture
+async def client(session_factory):
+    # The app's own engine is instrumented at import; do the same for the test database
+    instrument_engine(session_factory.kw["bind"])
+    async with session_factory() as db:
+        company = Company(name="Acme", currency="USD")
+        db.add(company)
+        await db.flush()
+        admin = User(username="admin", email="a@example.com", hashed_password="x", role=Role.ADMIN, company_id=company.id)
+        db.add(admin)
+        await db.commit()
+
+    async def override_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[is_admin] = lambda: admin
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_db_statements_are_attributed_to_the_route_template(client):
+    route = "/users/{user_id}"
+    before = list(REQUEST_DB_STATEMENTS.values.get((route,), [0] * (len(REQUEST_DB_STATEMENTS.buckets) + 2)))
+    response = await client.patch("/users/1", params={"role": "ADMIN"})
+    assert response.status_code == 200
+
+    series = REQUEST_DB_STATEMENTS.values[(route,)]
+    # One more request in the series, and its statements counted through the ContextVar
+    assert sum(series[:-1]) == sum(before[:-1]) + 1
+    assert series[-1] - before[-1] >= 2
+
+    samples = parse_exposition((await client.get("/metrics")).text)
+    labels = '{route="/users/{user_id}"}'
+    count = samples[f"http_request_db_statements_count{labels}"]
+    assert count == sum(series[:-1])
+    assert samples[f"http_request_db_statements_sum{labels}"] == series[-1]
+    buckets = [
+        samples[f'http_request_db_statements_bucket{{route="/users/{{user_id}}",le="{bound}"}}']
+        for bound in REQUEST_DB_STATEMENTS.buckets + ("+Inf",)
+    ]
+    assert buckets == sorted(buckets)
+    assert buckets[-1] == count
+    assert samples['http_requests_total{method="PATCH",route="/users/{user_id}",status="200"}'] >= 1
+    # Raw paths never become labels
+    assert not any('"/users/1"' in key for key in samples)
+
+
+@pytest.mark.asyncio
+async def test_unknown_paths_share_the_catch_all_label(client):
+    response = await client.get("/no/such/path/42")
+    assert response.status_code == 404
+    samples = parse_exposition((await client.get("/metrics")).text)
+    # The SPA fallback route matches everything else, so unknown paths can't add series
+    assert samples['http_requests_total{method="GET",route="/{full_path:path}",status="404"}'] >= 1
+    assert samples['http_request_db_statements_bucket{route="/{full_path:path}",le="0"}'] >= 1
+    assert not any("/no/such/path" in key for key in samples)
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import database
+from app.database import Base
+
+
+def alembic_config(url: str) -> Config:
+    config = Config()
+    config.set_main_option("script_location", database.MIGRATIONS_DIR)
+    config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+def current_revision(path) -> str:
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.connect() as conn:
+        revision = database._current_revision(conn)
+    engine.dispose()
+    return revision
+
+
+def head_revision() -> str:
+    from alembic.script import ScriptDirectory
+    return ScriptDirectory.from_config(alembic_config("sqlite://")).get_current_head()
+
+
+def test_upgrade_from_empty_database_and_back(tmp_path):
+    config = alembic_config(f"sqlite+aiosqlite:///{tmp_path / 'db.sqlite'}")
+    command.upgrade(config, "head")
+    assert current_revision(tmp_path / "db.sqlite") == head_revision()
+    command.downgrade(config, "base")
+    assert current_revision(tmp_path / "db.sqlite") is None
+
+
+@pytest.mark.asyncio
+async def test_create_schema_stamps_a_new_database(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'db.sqlite'}")
+    monkeypatch.setattr(database, "engine", engine)
+    await database.create_schema()
+    await engine.dispose()
+    assert current_revision(tmp_path / "db.sqlite") == head_revision()
+    # Nothing left for Alembic to do (env.py runs its own event loop, hence the thread)
+    await asyncio.to_thread(command.upgrade, alembic_config(f"sqlite+aiosqlite:///{tmp_path / 'db.sqlite'}"), "head")
+
+
+def test_migrations_match_the_models(tmp_path):
+    url = f"sqlite:///{tmp_path / 'db.sqlite'}"
+    command.upgrade(alembic_config(f"sqlite+aiosqlite:///{tmp_path / 'db.sqlite'}"), "head")
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        assert database._missing_schema(conn) == []
+        assert compare_metadata(MigrationContext.configure(conn), Base.metadata) == []
+    engine.dispose()
+
+
+def test_missing_columns_are_reported(tmp_path):
+    command.upgrade(alembic_config(f"sqlite+aiosqlite:///{tmp_path / 'db.sqlite'}"), "0006_listing_indexes")
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    with engine.connect() as conn:
+        assert database._missing_schema(conn) == [
+            "approval_requests.reminded_at", "approval_requests.escalated_at", "approval_requests.escalation_level",
+        ]
+    engine.dispose()
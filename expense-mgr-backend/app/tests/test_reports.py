@@ -0,0 +1,81 @@
+import asyncio
+import csv
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.models import Company, Expense, ExpenseStatus, User
+from app.services.reports import DONE, ReportJob, ReportManager, _cells, download_response
+
+CONTENT = bytes(range(100))
+
+
+def test_formula_like_text_is_escaped():
+    row = ("=HYPERLINK(\"http://evil\")", "+1", "-2", "@SUM(A1)", "\tx", "plain", -5.0, ExpenseStatus.PENDING)
+    assert _cells(row) == ("'=HYPERLINK(\"http://evil\")", "'+1", "'-2", "'@SUM(A1)", "'\tx", "plain", -5.0, "PENDING")
+
+
+@pytest.mark.asyncio
+async def test_report_escapes_user_text(session_factory, tmp_path):
+    async with session_factory() as db:
+        db.add(Company(id=1, name="Acme", currency="USD"))
+        db.add(User(id=1, username="mallory", email="m@example.com", hashed_password="x", company_id=1))
+        db.add(Expense(company_id=1, employee_id=1, amount=5, currency="USD", amount_in_company_currency=5,
+                       category="@Travel", description="=1+1"))
+        await db.commit()
+    manager = ReportManager(directory=str(tmp_path), session_factory=session_factory)
+    job = await manager.submit(1, "csv")
+    while job.status not in (DONE, "failed"):
+        await asyncio.sleep(0.01)
+    assert job.status == DONE
+    with open(manager.path_for(job), newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert (rows[0]["category"], rows[0]["description"]) == ("'@Travel", "'=1+1")
+
+
+@pytest.fixture
+def client(tmp_path):
+    manager = ReportManager(directory=str(tmp_path))
+    job = ReportJob(id="0" * 32, company_id=1, format="csv", status=DONE)
+    path = manager.path_for(job)
+    (tmp_path / "1").mkdir()
+    with open(path, "wb") as f:
+        f.write(CONTENT)
+    app = FastAPI()
+
+    @app.get("/download")
+    async def download(request: Request):
+        return download_response(manager, job, request)
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("header, status, content_range, body", [
+    ("bytes=0-9", 206, "bytes 0-9/100", CONTENT[:10]),
+    ("bytes=90-", 206, "bytes 90-99/100", CONTENT[90:]),
+    ("bytes=-5", 206, "bytes 95-99/100", CONTENT[95:]),
+    ("bytes=-500", 206, "bytes 0-99/100", CONTENT),
+    ("bytes=50-500", 206, "bytes 50-99/100", CONTENT[50:]),
+    ("bytes=100-", 416, "bytes */100", b""),
+    ("bytes=9-3", 416, "bytes */100", b""),
+    # Multiple or malformed ranges are answered with the whole file
+    ("bytes=0-1,5-6", 200, None, CONTENT),
+    ("items=0-9", 200, None, CONTENT),
+    ("bytes=-", 200, None, CONTENT),
+])
+def test_range_requests(client, header, status, content_range, body):
+    response = client.get("/download", headers={"Range": header})
+    assert response.status_code == status
+    assert response.headers.get("content-range") == content_range
+    if status != 416:
+        assert response.content == body
+        assert response.headers["content-length"] == str(len(body))
+
+
+def test_if_range(client):
+    etag = client.get("/download").headers["etag"]
+    assert client.get("/download", headers={"Range": "bytes=0-9", "If-Range": etag}).status_code == 206
+    stale = client.get("/download", headers={"Range": "bytes=0-9", "If-Range": '"other"'})
+    assert stale.status_code == 200
+    assert stale.content == CONTENT
@@ -0,0 +1,48 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import auth, database
+from app.crud import search_expenses
+from app.main import app
+from app.models import Company, Expense, Role, User
+from app.services.search import SearchIndex, search_index
+
+
+@pytest.mark.asyncio
+async def test_prepare_builds_a_missing_sqlite_index(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'db.sqlite'}")
+    monkeypatch.setattr(database, "engine", engine)
+    # Tables only, as after `alembic upgrade head` on SQLite
+    async with engine.begin() as conn:
+        await conn.run_sync(database.Base.metadata.create_all)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as db:
+        db.add(Company(id=1, name="Acme", currency="USD"))
+        db.add(Expense(company_id=1, employee_id=1, amount=5, currency="USD", amount_in_company_currency=5,
+                       category="Travel", description="Taxi to the airport"))
+        await db.commit()
+
+    index = SearchIndex()
+    assert await index.prepare() is True
+    assert index.available
+    # Existing rows are indexed, and a second start finds the index in place
+    async with session_factory() as db:
+        rows = await search_expenses(db, 1, "airp")
+    assert [row.description for row in rows] == ["Taxi to the airport"]
+    assert await SearchIndex().prepare() is True
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_search_answers_503_when_unavailable(monkeypatch):
+    monkeypatch.setattr(search_index, "available", False)
+    user = User(id=1, username="u", email="u@example.com", role=Role.EMPLOYEE, company_id=1)
+    app.dependency_overrides[auth.get_current_user] = lambda: user
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/expenses/search", params={"q": "taxi"})
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 503
@@ -0,0 +1,163 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.crud import get_audit_logs
+from app.models import ApprovalRequest, Company, Expense, ExpenseStatus, Role, User
+from app.services import sla_scheduler as sla_module
+from app.services.audit import audit_writer
+from app.services.events import broker
+from app.services.sla_scheduler import SlaScheduler
+
+
+async def seed(session_factory, with_vp: bool = False) -> int:
+    """manager (2) reports to director (1), who reports to vp (3) if there is one."""
+    async with session_factory() as db:
+        company = Company(name="Acme", currency="USD")
+        db.add(company)
+        await db.flush()
+        director = User(username="director", email="d@example.com", hashed_password="x", role=Role.MANAGER, company_id=company.id)
+        db.add(director)
+        await db.flush()
+        manager = User(username="manager", email="m@example.com", hashed_password="x", role=Role.MANAGER,
+                       company_id=company.id, manager_id=director.id)
+        db.add(manager)
+        await db.flush()
+        expense = Expense(employee_id=manager.id, company_id=company.id, amount=10, currency="USD", amount_in_company_currency=10)
+        db.add(expense)
+        await db.flush()
+        approval = ApprovalRequest(expense_id=expense.id, approver_id=manager.id)
+        db.add(approval)
+        if with_vp:
+            vp = User(username="vp", email="v@example.com", hashed_password="x", role=Role.MANAGER, company_id=company.id)
+            db.add(vp)
+            await db.flush()
+            director.manager_id = vp.id
+        await db.commit()
+        return approval.id
+
+
+async def next_event(inbox, timeout: float = 2.0) -> str:
+    return (await asyncio.wait_for(inbox.get(), timeout)).type
+
+
+async def wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not await condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def sent_emails(monkeypatch):
+    sent = []
+
+    async def fake_send_email(to_email, subject, body):
+        await asyncio.sleep(0)
+        sent.append(to_email)
+
+    monkeypatch.setattr(sla_module, "send_email", fake_send_email)
+    return sent
+
+
+@pytest.mark.asyncio
+async def test_created_at_is_utc(session_factory):
+    approval_id = await seed(session_factory)
+    async with session_factory() as db:
+        approval = await db.get(ApprovalRequest, approval_id)
+    assert abs(approval.created_at - datetime.utcnow()) < timedelta(seconds=5)
+
+
+@pytest.mark.asyncio
+async def test_overdue_approval_is_reminded_then_escalated(session_factory, sent_emails):
+    approval_id = await seed(session_factory)
+    await broker.start()
+    scheduler = SlaScheduler(reminder_after=timedelta(0), escalate_after=timedelta(milliseconds=200), session_factory=session_factory)
+
+    async def load(approval_id=approval_id):
+        async with session_factory() as db:
+            return await db.get(ApprovalRequest, approval_id, populate_existing=True)
+
+    with broker.subscribe(2) as manager_inbox, broker.subscribe(1) as director_inbox:
+        await scheduler.start()
+        try:
+            assert await next_event(manager_inbox) == "approval.reminder"
+            assert (await load()).reminded_at is not None
+
+            # Events are published after the escalation is committed
+            assert await next_event(manager_inbox) == "approval.escalated"
+            assert await next_event(director_inbox) == "approval.created"
+            approval = await load()
+            assert (approval.approver_id, approval.escalation_level) == (1, 1)
+
+            # The new approver's clocks start from the escalation
+            async def director_reminded():
+                return len(sent_emails) == 2
+            await wait_for(director_reminded)
+            assert sent_emails == ["m@example.com", "d@example.com"]
+            assert await next_event(director_inbox) == "approval.reminder"
+        finally:
+            await scheduler.stop()
+    # Finished email tasks don't pile up
+    assert not scheduler._email_tasks
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("concurrent", [False, True])
+async def test_two_schedulers_escalate_once(session_factory, monkeypatch, concurrent):
+    approval_id = await seed(session_factory, with_vp=True)
+    monkeypatch.setattr(audit_writer, "session_factory", session_factory)
+    audit_writer._buffer.clear()
+    # Two workers, or an old and a new process during a restart, holding the same deadline
+    first, second = (SlaScheduler(session_factory=session_factory) for _ in range(2))
+    await first.load()
+    await second.load()
+    assigned_at = first._assigned[approval_id]
+    assert second._assigned[approval_id] == assigned_at
+
+    if concurrent:
+        await asyncio.gather(first._escalate(approval_id, assigned_at), second._escalate(approval_id, assigned_at))
+    else:
+        await first._escalate(approval_id, assigned_at)
+        await second._escalate(approval_id, assigned_at)
+
+    async with session_factory() as db:
+        approval = await db.get(ApprovalRequest, approval_id)
+    assert (approval.approver_id, approval.escalation_level) == (1, 1)
+    # Both now time the director's assignment
+    assert first._assigned[approval_id] == second._assigned[approval_id] == approval.escalated_at
+
+    # Audited once, and visible to the company's audit log
+    await audit_writer.flush()
+    async with session_factory() as db:
+        logs = await get_audit_logs(db, company_id=1, action="approval_escalated")
+    assert [(log.user_id, log.details) for log in logs] == [
+        (2, {"approval_id": approval_id, "from_user_id": 2, "to_user_id": 1})
+    ]
+
+    # A reminder computed for the manager's assignment doesn't reach the director
+    await second._remind(approval_id, assigned_at)
+    async with session_factory() as db:
+        assert (await db.get(ApprovalRequest, approval_id)).reminded_at is None
+
+
+@pytest.mark.asyncio
+async def test_settled_expenses_are_not_chased(session_factory, sent_emails):
+    # An expense settled before overrides closed its requests
+    approval_id = await seed(session_factory)
+    async with session_factory() as db:
+        approval = await db.get(ApprovalRequest, approval_id)
+        (await db.get(Expense, approval.expense_id)).status = ExpenseStatus.APPROVED
+        await db.commit()
+    scheduler = SlaScheduler(session_factory=session_factory)
+    await scheduler.load()
+    assigned_at = scheduler._assigned[approval_id]
+
+    await scheduler._remind(approval_id, assigned_at)
+    await scheduler._escalate(approval_id, assigned_at)
+    async with session_factory() as db:
+        approval = await db.get(ApprovalRequest, approval_id)
+    assert (approval.approver_id, approval.reminded_at, approval.escalation_level) == (2, None, 0)
+    assert approval_id not in scheduler._assigned
+    assert sent_emails == []
@@ -0,0 +1,252 @@
+import asyncio
+import re
+
+import httpx
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+
+from app.auth import get_password_hash, verify_password
+from app.config import settings
+from app.database import get_db
+from app.main import app
+from app.models import Company, User
+from app.routers import auth as auth_router
+from app.services import sms as sms_module
+from app.services.sms import CircuitBreaker, NumberThrottle, SmsDispatcher, SmsThrottled, SmsUnavailable
+from app.tests.sms_stub import SmsStub
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FixedJitter:
+    """Stands in for `random` so the backoff delay is the full window every time."""
+
+    @staticmethod
+    def uniform(low, high):
+        return high
+
+
+async def drained(dispatcher: SmsDispatcher, timeout: float = 2.0) -> None:
+    await asyncio.wait_for(dispatcher._queue.join(), timeout)
+
+
+@pytest.fixture
+def stub():
+    return SmsStub()
+
+
+@pytest_asyncio.fixture
+async def dispatcher(stub):
+    dispatcher = SmsDispatcher(
+        api_url="http://sms.test/sms",
+        workers=1,
+        max_attempts=3,
+        backoff=0,
+        breaker=CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=FakeClock()),
+        throttle=NumberThrottle(limit=3, window=60, clock=FakeClock()),
+        transport=ASGITransport(app=stub.app),
+    )
+    await dispatcher.start()
+    yield dispatcher
+    await dispatcher.stop(drain_timeout=0)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status", [500, 503, 429])
+async def test_retryable_failures_are_retried(stub, dispatcher, status):
+    stub.fail_next(2, status)
+    dispatcher.send("+15550001", "hello")
+    await drained(dispatcher)
+    assert stub.requests == 3
+    assert [m["message"] for m in stub.messages] == ["hello"]
+    assert dispatcher.breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honoured(stub, dispatcher, monkeypatch):
+    # Without Retry-After the worker would back off for a minute
+    dispatcher.backoff = 60
+    monkeypatch.setattr(sms_module, "random", FixedJitter)
+    stub.fail_next(1, 429, retry_after=0.05)
+    dispatcher.send("+15550001", "hello")
+    await drained(dispatcher)
+    assert stub.requests == 2
+    assert len(stub.messages) == 1
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_final(stub, dispatcher):
+    stub.fail_next(1, 400)
+    dispatcher.send("+15550001", "hello")
+    await drained(dispatcher)
+    assert stub.requests == 1
+    assert stub.messages == []
+    assert dispatcher.breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_and_fails_fast(stub, dispatcher):
+    stub.fail_next(3, 503)
+    dispatcher.send("+15550001", "lost")
+    await drained(dispatcher)
+    assert dispatcher.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(SmsUnavailable):
+        dispatcher.send("+15550002", "refused")
+    assert stub.requests == 3
+
+
+def test_breaker_half_open_trial():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    # One trial call once the timeout has passed; a failed trial re-opens at once
+    clock.now = 30
+    assert not breaker.is_open()
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    assert breaker.is_open()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    # A successful trial closes it
+    clock.now = 60
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_throttle_is_per_number_and_slides():
+    clock = FakeClock()
+    throttle = NumberThrottle(limit=2, window=60, clock=clock)
+    assert throttle.acquire("+15550001")
+    clock.now = 10
+    assert throttle.acquire("+15550001")
+    assert not throttle.acquire("+15550001")
+    assert throttle.acquire("+15550002")
+
+    # The first message leaves the window, the second still counts
+    clock.now = 60
+    assert throttle.acquire("+15550001")
+    assert not throttle.acquire("+15550001")
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_refuses_throttled_numbers(stub, dispatcher):
+    for _ in range(3):
+        dispatcher.send("+15550001", "hello")
+    with pytest.raises(SmsThrottled):
+        dispatcher.send("+15550001", "hello")
+    dispatcher.send("+15550002", "hello")
+    await drained(dispatcher)
+    assert len(stub.messages) == 4
+
+
+@pytest_asyncio.fixture
+async def reset_client(session_factory, dispatcher, monkeypatch):
+    async with session_factory() as db:
+        company = Company(name="Acme", currency="USD")
+        db.add(company)
+        await db.flush()
+        db.add(User(username="alice", email="a@example.com", hashed_password=get_password_hash("old-password"),
+                    company_id=company.id, mobile_number="+15550001"))
+        await db.commit()
+
+    async def override_db():
+        async with session_factory() as session:
+            yield session
+
+    monkeypatch.setattr(auth_router, "sms_dispatcher", dispatcher)
+    app.dependency_overrides[get_db] = override_db
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+
+
+async def request_code(client, stub, dispatcher) -> httpx.Response:
+    response = await client.post("/auth/forgot-password", json={"username": "alice"})
+    await drained(dispatcher)
+    return response
+
+
+def last_code(stub) -> str:
+    return re.search(r"code is (\d+)", stub.messages[-1]["message"]).group(1)
+
+
+async def stored_password(session_factory) -> str:
+    async with session_factory() as db:
+        return (await db.get(User, 1)).hashed_password
+
+
+@pytest.mark.asyncio
+async def test_reset_flow(reset_client, stub, dispatcher, session_factory):
+    response = await request_code(reset_client, stub, dispatcher)
+    assert response.status_code == 202
+    assert stub.messages[-1]["to"] == "+15550001"
+    code = last_code(stub)
+    assert len(code) == settings.RESET_CODE_LENGTH
+    async with session_factory() as db:
+        assert code not in (await db.get(User, 1)).reset_token
+
+    wrong = "0" * len(code) if code != "0" * len(code) else "1" * len(code)
+    reset = {"username": "alice", "new_password": "new-password"}
+    assert (await reset_client.post("/auth/reset-password", json={**reset, "code": wrong})).status_code == 400
+    assert (await reset_client.post("/auth/reset-password", json={**reset, "code": code})).status_code == 200
+    assert verify_password("new-password", await stored_password(session_factory))
+    # Codes work once
+    assert (await reset_client.post("/auth/reset-password", json={**reset, "code": code})).status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_code_is_void_after_too_many_guesses(reset_client, stub, dispatcher, session_factory):
+    await request_code(reset_client, stub, dispatcher)
+    code = last_code(stub)
+    wrong = "0" * len(code) if code != "0" * len(code) else "1" * len(code)
+    reset = {"username": "alice", "new_password": "new-password"}
+    for _ in range(settings.RESET_CODE_MAX_ATTEMPTS):
+        assert (await reset_client.post("/auth/reset-password", json={**reset, "code": wrong})).status_code == 400
+    assert (await reset_client.post("/auth/reset-password", json={**reset, "code": code})).status_code == 400
+    assert verify_password("old-password", await stored_password(session_factory))
+
+
+@pytest.mark.asyncio
+async def test_forgot_password_answers_the_same_for_every_account(reset_client, stub, dispatcher):
+    unknown = await reset_client.post("/auth/forgot-password", json={"username": "nobody"})
+    assert unknown.status_code == 202
+
+    for _ in range(3):
+        await request_code(reset_client, stub, dispatcher)
+    code = last_code(stub)
+    # Throttled: still 202, nothing sent, and the code already sent stays valid
+    throttled = await request_code(reset_client, stub, dispatcher)
+    assert throttled.status_code == 202
+    assert throttled.json() == unknown.json()
+    assert len(stub.messages) == 3
+
+    # Provider down: same answer
+    dispatcher.breaker.record_failure()
+    dispatcher.breaker.record_failure()
+    dispatcher.breaker.record_failure()
+    dispatcher.throttle = NumberThrottle(limit=3, window=60, clock=FakeClock())
+    unavailable = await request_code(reset_client, stub, dispatcher)
+    assert unavailable.status_code == 202
+    assert len(stub.messages) == 3
+
+    reset = {"username": "alice", "code": code, "new_password": "new-password"}
+    assert (await reset_client.post("/auth/reset-password", json=reset)).status_code == 200
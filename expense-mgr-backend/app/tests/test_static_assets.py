@@ -0,0 +1,83 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.static_assets import HASHED_NAME_RE, IMMUTABLE_CACHE, REVALIDATE_CACHE, StaticAssets
+
+
+@pytest.mark.parametrize("name", [
+    "main.3f9a1c2b.js",
+    "main.3f9a1c2b.chunk.js",
+    "main.3f9a1c2b.js.map",
+    "index-Bk3X9aZq.css",
+])
+def test_hashed_names_are_immutable(name):
+    assert HASHED_NAME_RE.search(name)
+
+
+@pytest.mark.parametrize("name", [
+    "asset-manifest.json",
+    "my-component.js",
+    "index.html",
+    "logo192.png",
+    "service-worker.js",
+])
+def test_plain_names_revalidate(name):
+    assert not HASHED_NAME_RE.search(name)
+
+
+@pytest.fixture
+def client(tmp_path):
+    (tmp_path / "index.html").write_text("<html>" + "x" * 2000 + "</html>")
+    (tmp_path / "asset-manifest.json").write_text("{}")
+    (tmp_path / "main.3f9a1c2b.js").write_text("console.log(1)")
+    assets = StaticAssets(str(tmp_path))
+    assets.load()
+    app = FastAPI()
+
+    @app.api_route("/{path:path}", methods=["GET", "HEAD"])
+    async def serve(path: str, request: Request):
+        return assets.serve_path(path, request)
+
+    return TestClient(app)
+
+
+def test_cache_control(client):
+    assert client.get("/main.3f9a1c2b.js").headers["cache-control"] == IMMUTABLE_CACHE
+    assert client.get("/asset-manifest.json").headers["cache-control"] == REVALIDATE_CACHE
+
+
+def test_head_sends_headers_only(client):
+    get = client.get("/index.html", headers={"Accept-Encoding": "identity"})
+    head = client.head("/index.html", headers={"Accept-Encoding": "identity"})
+    assert head.status_code == 200
+    assert head.content == b""
+    assert head.headers["content-length"] == str(len(get.content))
+    assert head.headers["etag"] == get.headers["etag"]
+    assert client.head("/index.html", headers={"Accept-Encoding": "gzip"}).headers["content-encoding"] == "gzip"
+
+
+def test_each_encoding_has_its_own_etag(client):
+    tags = {}
+    for encoding in ("identity", "gzip", "br"):
+        response = client.get("/index.html", headers={"Accept-Encoding": encoding})
+        # br is only there when the optional brotli package is
+        tags[response.headers.get("content-encoding", "identity")] = response.headers["etag"]
+    assert {"identity", "gzip"} <= set(tags)
+    assert len(set(tags.values())) == len(tags)
+    assert tags["gzip"] == tags["identity"][:-1] + '-gzip"'
+
+
+def test_if_none_match_accepts_any_variant(client):
+    identity = client.get("/index.html", headers={"Accept-Encoding": "identity"}).headers["etag"]
+    gzip_tag = client.get("/index.html", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+
+    same = client.get("/index.html", headers={"Accept-Encoding": "gzip", "If-None-Match": gzip_tag})
+    assert same.status_code == 304
+    assert same.headers["etag"] == gzip_tag
+    # A cache holding the identity copy revalidates it even if it advertises gzip
+    other = client.get("/index.html", headers={"Accept-Encoding": "gzip", "If-None-Match": f'"stale", W/{identity}'})
+    assert other.status_code == 304
+    assert other.headers["etag"] == identity
+
+    assert client.get("/index.html", headers={"If-None-Match": '"stale"'}).status_code == 200
@@ -0,0 +1,174 @@
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+
+from app.database import get_db
+from app.deps import is_admin
+from app.main import app
+from app.models import ApprovalRule, Company, Role, User
+from app.services.events import broker
+from app.services.tenant_cache import TenantCache, tenant_cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingCache(TenantCache):
+    """Counts trips to the database and can run a hook while a load is in flight."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.loads = 0
+        self.during_load = None
+
+    async def _load(self, db, company_id):
+        self.loads += 1
+        context = await super()._load(db, company_id)
+        if self.during_load is not None:
+            self.during_load()
+        return context
+
+
+@pytest_asyncio.fixture
+async def companies(session_factory):
+    async with session_factory() as db:
+        db.add_all([Company(name=f"Company {i}", currency="USD") for i in range(1, 4)])
+        await db.flush()
+        db.add(ApprovalRule(company_id=1, name="Default", is_sequential=True, rules={"percentage": 60}))
+        await db.commit()
+    return session_factory
+
+
+@pytest.mark.asyncio
+async def test_hit_after_miss(companies):
+    cache = CountingCache(clock=FakeClock())
+    async with companies() as db:
+        first = await cache.get(db, 1)
+        second = await cache.get(db, 1)
+    assert first is second
+    assert cache.loads == 1
+    assert first.name == "Company 1"
+    assert [rule.name for rule in first.rules] == ["Default"]
+    assert first.rules[0].rules["percentage"] == 60
+
+
+@pytest.mark.asyncio
+async def test_missing_company_is_not_cached(companies):
+    cache = CountingCache(clock=FakeClock())
+    async with companies() as db:
+        assert await cache.get(db, 99) is None
+        assert await cache.get(db, 99) is None
+    assert cache.loads == 2
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_invalidation_only_drops_older_versions(companies):
+    cache = CountingCache(clock=FakeClock())
+    async with companies() as db:
+        cached = await cache.get(db, 1)
+        # Late or repeated broadcasts for a version the entry already has are ignored
+        cache.invalidate_local(1, cached.version)
+        cache.invalidate_local(1, cached.version - 1)
+        assert await cache.get(db, 1) is cached
+        assert cache.loads == 1
+
+        cache.invalidate_local(1, cached.version + 1)
+        assert await cache.get(db, 1) is not cached
+        assert cache.loads == 2
+
+
+@pytest.mark.asyncio
+async def test_load_overlapping_an_invalidation_is_not_cached(companies):
+    cache = CountingCache(clock=FakeClock())
+    # The row was read before another worker's write landed
+    cache.during_load = lambda: cache.invalidate_local(1, 1)
+    async with companies() as db:
+        assert (await cache.get(db, 1)).company_id == 1
+        assert len(cache) == 0
+
+        cache.during_load = None
+        await cache.get(db, 1)
+        await cache.get(db, 1)
+    assert cache.loads == 2
+
+
+@pytest.mark.asyncio
+async def test_entries_expire(companies):
+    clock = FakeClock()
+    cache = CountingCache(ttl=10, clock=clock)
+    async with companies() as db:
+        await cache.get(db, 1)
+        clock.now = 9.9
+        await cache.get(db, 1)
+        assert cache.loads == 1
+        clock.now = 10
+        await cache.get(db, 1)
+    assert cache.loads == 2
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_is_evicted(companies):
+    cache = CountingCache(capacity=2, clock=FakeClock())
+    async with companies() as db:
+        await cache.get(db, 1)
+        await cache.get(db, 2)
+        await cache.get(db, 1)
+        await cache.get(db, 3)
+        assert len(cache) == 2
+        assert cache.loads == 3
+        await cache.get(db, 1)
+        assert cache.loads == 3
+        await cache.get(db, 2)
+    assert cache.loads == 4
+
+
+@pytest_asyncio.fixture
+async def admin_client(companies):
+    async with companies() as db:
+        admin = User(username="admin", email="a@example.com", hashed_password="x", role=Role.ADMIN, company_id=1)
+        db.add(admin)
+        await db.commit()
+
+    async def override_db():
+        async with companies() as session:
+            yield session
+
+    await broker.start()
+    tenant_cache.clear()
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[is_admin] = lambda: admin
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+        tenant_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_company_update_refreshes_the_cache(admin_client, companies):
+    async with companies() as db:
+        before = await tenant_cache.get(db, 1)
+    response = await admin_client.patch("/admin/company", json={"currency": "eur"})
+    assert response.status_code == 200
+    assert response.json()["currency"] == "EUR"
+    async with companies() as db:
+        after = await tenant_cache.get(db, 1)
+    assert after.currency == "EUR"
+    assert after.version == before.version + 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("body", [{"name": None}, {"name": ""}, {"currency": None}, {"currency": "EURO"}, {"currency": "E1R"}])
+async def test_company_update_rejects_invalid_fields(admin_client, companies, body):
+    response = await admin_client.patch("/admin/company", json=body)
+    assert response.status_code == 422
+    async with companies() as db:
+        company = await db.get(Company, 1)
+    assert (company.name, company.currency, company.settings_version) == ("Company 1", "USD", 0)
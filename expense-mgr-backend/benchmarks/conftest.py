@@ -0,0 +1,100 @@
+import asyncio
+import os
+
+# Micro-benchmarks run against an in-memory SQLite database and never touch real services
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite://"
+for key, value in {
+    "SECRET_KEY": "benchmark-secret",
+    "SMTP_HOST": "localhost",
+    "SMTP_PORT": "587",
+    "SMTP_USER": "bench@example.com",
+    "SMTP_PASSWORD": "unused",
+    "SMS_API_URL": "http://localhost/sms",
+    "SMS_API_KEY": "unused",
+    "SMS_SENDER_ID": "BENCH",
+}.items():
+    os.environ.setdefault(key, value)
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.auth import get_password_hash
+from app.database import Base
+from app.models import Company, Expense, ExpenseStatus, Role, User
+
+USERS = 1000
+EXPENSES = 10_000
+
+
+class StubResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+COUNTRIES_PAYLOAD = [
+    {"name": {"common": f"Country {i}"}, "currencies": {f"C{i:02d}": {"name": f"Currency {i}"}}}
+    for i in range(250)
+]
+RATES_PAYLOAD = {"base": "USD", "rates": {f"C{i:02d}": 1 + i / 100 for i in range(160)} | {"INR": 83.1, "EUR": 0.92}}
+
+
+@pytest.fixture(scope="session")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def run(loop):
+    """Run a coroutine function to completion, e.g. `benchmark(run, lambda: crud.get_user(db, 1))`."""
+    return lambda coro_fn: loop.run_until_complete(coro_fn())
+
+
+@pytest.fixture(scope="session")
+def db(loop):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(insert(Company.__table__), [{"id": 1, "name": "Bench", "currency": "USD"}])
+            hashed = get_password_hash("benchmark")
+            await conn.execute(insert(User.__table__), [
+                {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": hashed,
+                 "role": Role.EMPLOYEE, "company_id": 1}
+                for i in range(1, USERS + 1)
+            ])
+            await conn.execute(insert(Expense.__table__), [
+                {"employee_id": i % USERS + 1, "company_id": 1, "amount": 10.0 + i % 500, "currency": "USD",
+                 "amount_in_company_currency": 10.0 + i % 500, "category": "Travel",
+                 "description": f"expense {i}", "status": ExpenseStatus.PENDING}
+                for i in range(EXPENSES)
+            ])
+        return session_factory()
+
+    session = loop.run_until_complete(setup())
+    yield session
+    loop.run_until_complete(session.close())
+    loop.run_until_complete(engine.dispose())
+
+
+@pytest.fixture
+def stub_http(monkeypatch):
+    """Serve canned country and exchange-rate payloads instead of calling the real APIs."""
+    from app.services import currency_service
+
+    def fake_get(url, *args, **kwargs):
+        return StubResponse(RATES_PAYLOAD if "latest" in url else COUNTRIES_PAYLOAD)
+
+    monkeypatch.setattr(currency_service.requests, "get", fake_get)
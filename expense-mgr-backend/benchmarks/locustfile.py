@@ -0,0 +1,87 @@
+"""
+Locust scenarios for the main user journeys: login, create expense, list expenses and approve.
+Seed the database with benchmarks/seed.py first, then from the expense-mgr-backend
+directory (`python -m` keeps the `benchmarks` package importable):
+
+    python -m locust -f benchmarks/locustfile.py --host http://127.0.0.1:8000 \\
+        --headless -u 200 -r 20 -t 5m --csv results/load
+
+BENCH_COMPANIES, BENCH_MANAGERS and BENCH_EMPLOYEES must match the seed arguments
+so the generated usernames exist.
+"""
+import os
+import random
+from locust import HttpUser, between, task
+
+from benchmarks.seed import CATEGORIES, PASSWORD, WORDS
+
+COMPANIES = int(os.getenv("BENCH_COMPANIES", "5"))
+MANAGERS = int(os.getenv("BENCH_MANAGERS", "10"))
+EMPLOYEES = int(os.getenv("BENCH_EMPLOYEES", "200"))
+
+
+class BenchUser(HttpUser):
+    abstract = True
+    wait_time = between(0.5, 2)
+
+    def username(self) -> str:
+        raise NotImplementedError
+
+    def on_start(self):
+        self.login()
+
+    def login(self):
+        resp = self.client.post(
+            "/auth/token",
+            data={"username": self.username(), "password": PASSWORD},
+            name="/auth/token",
+        )
+        resp.raise_for_status()
+        self.client.headers["Authorization"] = f"Bearer {resp.json()['access_token']}"
+
+
+class Employee(BenchUser):
+    weight = 8
+
+    def username(self) -> str:
+        return f"c{random.randint(1, COMPANIES)}_emp{random.randrange(EMPLOYEES)}"
+
+    @task(5)
+    def list_expenses(self):
+        self.client.get("/expenses/", name="/expenses/ [list]")
+
+    @task(2)
+    def create_expense(self):
+        self.client.post("/expenses/", name="/expenses/ [create]", json={
+            "amount": round(random.uniform(5, 2500), 2),
+            "currency": "USD",
+            "category": random.choice(CATEGORIES),
+            "description": " ".join(random.sample(WORDS, 3)),
+        })
+
+    @task(1)
+    def relogin(self):
+        self.login()
+
+
+class Manager(BenchUser):
+    weight = 2
+
+    def username(self) -> str:
+        return f"c{random.randint(1, COMPANIES)}_mgr{random.randrange(MANAGERS)}"
+
+    @task(3)
+    def pending(self):
+        self.client.get("/approvals/pending", name="/approvals/pending")
+
+    @task(1)
+    def approve(self):
+        resp = self.client.get("/approvals/pending", name="/approvals/pending")
+        if resp.status_code != 200 or not resp.json():
+            return
+        approval = random.choice(resp.json())
+        self.client.patch(
+            f"/approvals/{approval['id']}",
+            json={"approved": random.random() < 0.8, "comments": "load test"},
+            name="/approvals/{approval_id}",
+        )
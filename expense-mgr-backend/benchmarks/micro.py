@@ -0,0 +1,100 @@
+"""
+pytest-benchmark micro-benchmarks for the crud, auth, currency and serialization hot paths.
+External HTTP is stubbed and the database is an in-memory SQLite seeded by conftest.py.
+
+    python -m pytest benchmarks/micro.py --benchmark-json micro.json
+"""
+import itertools
+import json
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from jose import jwt
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from app import crud, schemas
+from app.auth import create_access_token, get_password_hash, verify_password
+from app.config import settings
+from app.models import Expense
+from app.serialization import rows_to_dicts
+from app.services.currency_service import convert_currency, get_countries_and_currencies
+from app.services.tenant_cache import tenant_cache
+
+_expense_ids = itertools.count()
+
+
+# --- crud ---
+def test_get_user_by_username(benchmark, run, db):
+    user = benchmark(run, lambda: crud.get_user_by_username(db, "user500"))
+    assert user.id == 500
+
+
+def test_get_company_by_id(benchmark, run, db):
+    company = benchmark(run, lambda: crud.get_company_by_id(db, 1))
+    assert company.currency == "USD"
+
+
+def test_tenant_cache_get(benchmark, run, db):
+    """Warm lookup that replaces get_company_by_id on the expense path."""
+    tenant_cache.clear()
+    run(lambda: tenant_cache.get(db, 1))
+    tenant = benchmark(run, lambda: tenant_cache.get(db, 1))
+    assert tenant.currency == "USD"
+
+
+def test_create_expense(benchmark, run, db):
+    def create():
+        return crud.create_expense(db, {
+            "employee_id": 1,
+            "company_id": 1,
+            "amount": 42.0,
+            "currency": "USD",
+            "amount_in_company_currency": 42.0,
+            "description": f"bench {next(_expense_ids)}",
+        })
+
+    assert benchmark(run, create).id
+
+
+# --- auth ---
+def test_create_access_token(benchmark):
+    assert benchmark(create_access_token, {"sub": "user1"})
+
+
+def test_decode_access_token(benchmark):
+    token = create_access_token({"sub": "user1"})
+    payload = benchmark(jwt.decode, token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    assert payload["sub"] == "user1"
+
+
+def test_verify_password(benchmark):
+    hashed = get_password_hash("benchmark")
+    # bcrypt is slow by design, a handful of rounds is enough for a stable median
+    assert benchmark.pedantic(verify_password, args=("benchmark", hashed), rounds=10, iterations=1)
+
+
+# --- currency ---
+def test_convert_currency(benchmark, stub_http):
+    assert benchmark(convert_currency, 100.0, "usd", "inr") == 100.0 * 83.1
+
+
+def test_get_countries_and_currencies(benchmark, stub_http):
+    assert len(benchmark(get_countries_and_currencies)) == 250
+
+
+# --- serialization of a 10k-row listing ---
+def test_serialize_orm_default_encoder(benchmark, run, db):
+    """What FastAPI does for response_model=List[Expense]: validate ORM objects, jsonable_encoder, json.dumps."""
+    result = run(lambda: db.execute(select(Expense).limit(10_000)))
+    expenses = result.scalars().all()
+    adapter = TypeAdapter(List[schemas.Expense])
+    body = benchmark(lambda: json.dumps(jsonable_encoder(adapter.validate_python(expenses, from_attributes=True))))
+    assert body.startswith("[")
+
+
+def test_serialize_rows_type_adapter(benchmark, run, db):
+    rows = run(lambda: crud.get_all_expenses(db, 1, limit=10_000))
+    assert len(rows) == 10_000
+    body = benchmark(lambda: schemas.ExpenseList.dump_json(rows_to_dicts(rows)))
+    assert body.startswith(b"[")
+
@@ -0,0 +1,130 @@
+"""
+Normalize benchmark outputs into one comparable JSON report and diff two reports.
+
+    # Merge whatever results you have into report.json
+    python -m benchmarks.report collect -o report.json \\
+        --micro micro.json --locust results/load_stats.csv --startup startup.json
+
+    # Fail (exit 1) if anything got more than 10% worse than the baseline
+    python -m benchmarks.report compare baseline.json report.json --threshold 0.10
+
+Every metric records whether lower or higher is better so the comparison knows which
+direction is a regression.
+"""
+import argparse
+import csv
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+LOWER, HIGHER = "lower", "higher"
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def from_micro(path: str) -> dict:
+    with open(path) as f:
+        data = json.load(f)
+    return {
+        f"micro.{bench['name']}.median_s": {"value": bench["stats"]["median"], "better": LOWER}
+        for bench in data["benchmarks"]
+    }
+
+
+def from_locust(path: str) -> dict:
+    metrics = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            name = row["Name"] if row["Type"] else "all"
+            prefix = f"load.{name}"
+            metrics[f"{prefix}.median_ms"] = {"value": float(row["Median Response Time"]), "better": LOWER}
+            metrics[f"{prefix}.p95_ms"] = {"value": float(row["95%"]), "better": LOWER}
+            metrics[f"{prefix}.rps"] = {"value": float(row["Requests/s"]), "better": HIGHER}
+            requests = int(row["Request Count"]) or 1
+            metrics[f"{prefix}.failure_rate"] = {"value": int(row["Failure Count"]) / requests, "better": LOWER}
+    return metrics
+
+
+def from_startup(path: str) -> dict:
+    with open(path) as f:
+        data = json.load(f)
+    return {f"startup.{phase}.median_s": {"value": stats["median_s"], "better": LOWER} for phase, stats in data.items()}
+
+
+def collect(args) -> None:
+    metrics = {}
+    for paths, loader in ((args.micro, from_micro), (args.locust, from_locust), (args.startup, from_startup)):
+        for path in paths or ():
+            metrics.update(loader(path))
+    report = {
+        "meta": {
+            "revision": _git_revision(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "metrics": dict(sorted(metrics.items())),
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(metrics)} metrics to {args.output}")
+
+
+def compare(args) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)["metrics"]
+    with open(args.current) as f:
+        current = json.load(f)["metrics"]
+
+    regressions = []
+    print(f"{'metric':<60} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name in sorted(baseline.keys() & current.keys()):
+        before, after = baseline[name]["value"], current[name]["value"]
+        if before == 0:
+            continue
+        change = (after - before) / before
+        worse = change > args.threshold if current[name]["better"] == LOWER else change < -args.threshold
+        marker = "  REGRESSION" if worse else ""
+        print(f"{name:<60} {before:>12.6g} {after:>12.6g} {change:>+8.1%}{marker}")
+        if worse:
+            regressions.append(name)
+    for name in sorted(baseline.keys() - current.keys()):
+        print(f"{name:<60} missing from current report")
+
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    collect_parser = sub.add_parser("collect", help="Merge benchmark outputs into one report")
+    collect_parser.add_argument("-o", "--output", required=True)
+    collect_parser.add_argument("--micro", action="append", help="pytest-benchmark --benchmark-json output")
+    collect_parser.add_argument("--locust", action="append", help="locust --csv *_stats.csv output")
+    collect_parser.add_argument("--startup", action="append", help="benchmarks.startup --json output")
+
+    compare_parser = sub.add_parser("compare", help="Diff two reports and fail on regressions")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative change (0.10 = 10%%)")
+
+    args = parser.parse_args()
+    if args.command == "collect":
+        collect(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Full-text search benchmark: latency of crud.search_expenses against a seeded database,
+next to the `ILIKE '%term%'` scan it replaces.
+
+Seed 5M expenses first (seed.py builds the search index once the rows are in), then run
+from the expense-mgr-backend directory:
+
+    python -m benchmarks.seed --companies 5 --expenses 5000000
+    python -m benchmarks.search --runs 20 --json results/search.json
+
+Each case fetches a first page and then follows the keyset cursor `--pages` pages deep,
+so both the index lookup and the ranked pagination are covered.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud
+from app.config import settings
+from app.crud import EXPENSE_ROW_COLUMNS
+from app.models import Expense, ExpenseStatus
+from app.services.search import install_search_index
+
+# (name, query, extra search_expenses keyword arguments); words come from seed.WORDS / CATEGORIES
+CASES = (
+    ("single_prefix", "air", {}),
+    ("two_words", "client dinn", {}),
+    ("category_word", "travel", {}),
+    ("three_words_rare", "taxi hotel printer", {}),
+    ("with_status", "conf", {"status": ExpenseStatus.PENDING}),
+    ("recent_order", "team", {"order": "recent"}),
+)
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 2),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 2),
+        "max_ms": round(samples[-1] * 1000, 2),
+    }
+
+
+async def timed(coro_fn):
+    started = time.perf_counter()
+    result = await coro_fn()
+    return time.perf_counter() - started, result
+
+
+async def run_case(session_factory, company_id, text_query, options, runs, pages, limit):
+    first_page, deep_page = [], []
+    matched = 0
+    for _ in range(runs):
+        async with session_factory() as db:
+            elapsed, rows = await timed(lambda: crud.search_expenses(db, company_id, text_query, limit=limit, **options))
+            first_page.append(elapsed)
+            matched = len(rows)
+            started = time.perf_counter()
+            for _ in range(pages):
+                if len(rows) < limit:
+                    break
+                last = rows[-1]
+                rows = await crud.search_expenses(
+                    db, company_id, text_query, before_id=last.id, before_rank=last.rank, limit=limit, **options
+                )
+            deep_page.append(time.perf_counter() - started)
+    return {"first_page": summarize(first_page), f"{pages}_more_pages": summarize(deep_page), "first_page_rows": matched}
+
+
+async def run_baseline(session_factory, company_id, text_query, runs, limit):
+    """The LIKE scan a search endpoint would otherwise need (no ranking, no stemming)."""
+    samples = []
+    for _ in range(runs):
+        async with session_factory() as db:
+            query = select(*EXPENSE_ROW_COLUMNS).where(Expense.company_id == company_id)
+            for term in text_query.split():
+                pattern = f"%{term}%"
+                query = query.where(or_(Expense.description.ilike(pattern), Expense.category.ilike(pattern)))
+            elapsed, _ = await timed(lambda: db.execute(query.order_by(Expense.id.desc()).limit(limit)))
+            samples.append(elapsed)
+    return summarize(samples)
+
+
+async def main_async(args):
+    engine = create_async_engine(args.database_url)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        started = time.perf_counter()
+        built = await install_search_index(conn)
+        build_seconds = time.perf_counter() - started
+    async with session_factory() as db:
+        total = await db.scalar(select(func.count()).select_from(Expense))
+        company_rows = await db.scalar(select(func.count()).where(Expense.company_id == args.company_id))
+
+    report = {
+        "dialect": engine.dialect.name,
+        "expenses": total,
+        "company_expenses": company_rows,
+        "index_build_seconds": round(build_seconds, 2) if built else None,
+        "cases": {},
+    }
+    for name, text_query, options in CASES:
+        case = await run_case(session_factory, args.company_id, text_query, options, args.runs, args.pages, args.limit)
+        if args.baseline:
+            case["like_scan"] = await run_baseline(session_factory, args.company_id, text_query, args.runs, args.limit)
+        report["cases"][name] = case
+        print(f"{name:18} {json.dumps(case)}")
+    await engine.dispose()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--company-id", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=5, help="Keyset pages to follow after the first one")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--no-baseline", dest="baseline", action="store_false", help="Skip the LIKE scan comparison")
+    parser.add_argument("--json", help="Write the results to this file")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Synthetic data generator for load tests and benchmarks.
+
+Creates companies, each with an admin, a manager hierarchy (one head manager and the
+other managers reporting to it), employees spread across the managers, expenses over
+the last `--days` days and approval requests for every pending expense. The same
+`--seed` always produces the same data.
+
+Run from the expense-mgr-backend directory against a local database:
+
+    python -m benchmarks.seed --companies 10 --expenses 2000000
+
+Every generated user has the password `benchmark`. Usernames follow
+`c{company}_admin`, `c{company}_mgr{n}` and `c{company}_emp{n}`, which is what
+benchmarks/locustfile.py logs in with.
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.auth import get_password_hash
+from app.config import settings
+from app.database import Base
+from app.models import ApprovalRequest, Company, Expense, ExpenseStatus, Role, User
+from app.services.search import install_search_index
+
+PASSWORD = "benchmark"
+CURRENCIES = ("USD", "EUR", "GBP", "INR")
+CATEGORIES = ("Travel", "Meals", "Lodging", "Supplies", "Software", "Training", "Fuel", "Entertainment")
+WORDS = (
+    "client", "dinner", "taxi", "flight", "hotel", "conference", "team", "lunch", "airport",
+    "office", "printer", "license", "workshop", "parking", "train", "uber", "coffee", "offsite",
+)
+STATUS_WEIGHTS = ((ExpenseStatus.APPROVED, 70), (ExpenseStatus.REJECTED, 20), (ExpenseStatus.PENDING, 10))
+
+
+async def next_id(conn, model) -> int:
+    return (await conn.scalar(select(func.coalesce(func.max(model.id), 0)))) + 1
+
+
+async def insert_batches(conn, table, rows, batch_size: int) -> None:
+    for i in range(0, len(rows), batch_size):
+        await conn.execute(insert(table), rows[i:i + batch_size])
+
+
+async def reset_sequences(conn) -> None:
+    """Explicit ids bypass Postgres sequences; move them past the seeded rows."""
+    if conn.dialect.name != "postgresql":
+        return
+    for table in ("companies", "users", "expenses", "approval_requests"):
+        await conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}"
+        ))
+
+
+def build_users(company_id: int, first_id: int, managers: int, employees: int, hashed: str):
+    rows, manager_ids, employee_managers = [], [], {}
+    user_id = first_id
+
+    def add(username, role, manager_id):
+        nonlocal user_id
+        rows.append({
+            "id": user_id,
+            "username": username,
+            "email": f"{username}@bench.example.com",
+            "hashed_password": hashed,
+            "role": role,
+            "company_id": company_id,
+            "manager_id": manager_id,
+            "is_manager_approver": True,
+        })
+        user_id += 1
+        return user_id - 1
+
+    add(f"c{company_id}_admin", Role.ADMIN, None)
+    head = add(f"c{company_id}_mgr0", Role.MANAGER, None)
+    manager_ids.append(head)
+    for n in range(1, managers):
+        manager_ids.append(add(f"c{company_id}_mgr{n}", Role.MANAGER, head))
+    for n in range(employees):
+        manager_id = manager_ids[n % len(manager_ids)]
+        employee_managers[add(f"c{company_id}_emp{n}", Role.EMPLOYEE, manager_id)] = manager_id
+    return rows, employee_managers
+
+
+async def seed(args) -> None:
+    rng = random.Random(args.seed)
+    engine = create_async_engine(args.database_url)
+    hashed = get_password_hash(PASSWORD)
+    statuses, weights = zip(*STATUS_WEIGHTS)
+    now = datetime.utcnow()
+    expenses_per_company = args.expenses // args.companies
+    started = time.perf_counter()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        company_id = await next_id(conn, Company)
+        user_id = await next_id(conn, User)
+        expense_id = await next_id(conn, Expense)
+        approval_id = await next_id(conn, ApprovalRequest)
+
+    for c in range(args.companies):
+        async with engine.begin() as conn:
+            currency = CURRENCIES[c % len(CURRENCIES)]
+            await conn.execute(insert(Company.__table__), [{"id": company_id, "name": f"Bench Company {company_id}", "currency": currency}])
+            users, employee_managers = build_users(company_id, user_id, args.managers, args.employees, hashed)
+            await insert_batches(conn, User.__table__, users, args.batch_size)
+            user_id += len(users)
+            employees = list(employee_managers)
+
+            remaining = expenses_per_company
+            while remaining > 0:
+                chunk = min(args.batch_size, remaining)
+                expenses, approvals = [], []
+                for _ in range(chunk):
+                    employee = rng.choice(employees)
+                    amount = round(rng.uniform(5, 2500), 2)
+                    status = rng.choices(statuses, weights)[0]
+                    created = now - timedelta(seconds=rng.randrange(args.days * 86400))
+                    expenses.append({
+                        "id": expense_id,
+                        "employee_id": employee,
+                        "company_id": company_id,
+                        "amount": amount,
+                        "currency": currency,
+                        "amount_in_company_currency": amount,
+                        "category": rng.choice(CATEGORIES),
+                        "description": " ".join(rng.sample(WORDS, 3)),
+                        "date": created,
+                        "status": status,
+                    })
+                    if status is ExpenseStatus.PENDING:
+                        approvals.append({
+                            "id": approval_id,
+                            "expense_id": expense_id,
+                            "approver_id": employee_managers[employee],
+                            "step": 1,
+                            "approved": None,
+                            "created_at": created,
+                        })
+                        approval_id += 1
+                    expense_id += 1
+                await conn.execute(insert(Expense.__table__), expenses)
+                if approvals:
+                    await conn.execute(insert(ApprovalRequest.__table__), approvals)
+                remaining -= chunk
+            print(f"company {company_id}: {len(users)} users, {expenses_per_company} expenses")
+            company_id += 1
+
+    async with engine.begin() as conn:
+        await reset_sequences(conn)
+        # No-op if the index already existed (its triggers kept up); otherwise one bulk build
+        await install_search_index(conn)
+    await engine.dispose()
+    print(f"Seeded {args.companies * expenses_per_company} expenses in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--companies", type=int, default=5)
+    parser.add_argument("--managers", type=int, default=10, help="Managers per company, including the head manager")
+    parser.add_argument("--employees", type=int, default=200, help="Employees per company")
+    parser.add_argument("--expenses", type=int, default=1_000_000, help="Total expenses across all companies")
+    parser.add_argument("--days", type=int, default=730, help="Spread expense dates over this many days")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(seed(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()